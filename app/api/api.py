@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.endpoints import properties, zones, admin, auth, user_data
+from app.api.endpoints import properties, zones, admin, auth, user_data, analytics
 
 api_router = APIRouter()
 
@@ -8,3 +8,4 @@ api_router.include_router(zones.router, prefix="/zones", tags=["zones"])
 api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(user_data.router, prefix="/user", tags=["user"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
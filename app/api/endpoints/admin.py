@@ -1,8 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, UploadFile, File
 from sqlmodel import Session
-import json
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Optional, Literal
 
 from app.core.database import engine
 from app.services.scraper import scrape_and_store_properties
@@ -10,12 +9,19 @@ from app.services.admin import AdminService
 from app.api.deps import get_current_user
 from app.core.models import User
 
-class IsochroneRequest(BaseModel):
+class Origin(BaseModel):
     lat: float
     lon: float
+
+class IsochroneRequest(BaseModel):
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    origins: Optional[List[Origin]] = None # Several commutes; overrides lat/lon when given
+    combine: Literal["intersection", "union"] = "intersection"
     contours: List[int] # Expecting 3 integers, e.g. [15, 30, 45]
-    valhalla_url: Optional[str] = "https://valhalla1.openstreetmap.de/isochrone"
+    valhalla_url: Optional[str] = None # Defaults to valhalla.url in config.yaml
     costing: Optional[str] = "auto"
+    for_user: bool = False # Generate the caller's own zones instead of the global set
 
 router = APIRouter()
 
@@ -25,23 +31,25 @@ def get_session():
 
 @router.post("/populate")
 def populate_db(
+    replay: bool = False,
     current_user: User = Depends(get_current_user)
 ):
     """
     Trigger the scraper to populate the database.
     Running synchronously to allow UI to show loading state.
+    Pass `replay=true` to re-run processing from the scrape cache without hitting the network.
     """
     from app.core.config import AppConfig
+    from app.services.scrape_planner import ScrapePlanner
     
-    locations = AppConfig.get_locations()
-    scraper_settings = AppConfig.get_scraper_settings()
-    listing_types = scraper_settings.get("listing_types", ["for_sale"])
-    past_days = scraper_settings.get("default_past_days", 30)
+    plan = ScrapePlanner.plan()
+    # Same window as the scheduled job, so replay finds the entries it cached
+    past_days = AppConfig.get_scraper_settings().get("past_days")
     
     # Synchronous call
-    scrape_and_store_properties(locations=locations, listing_type=listing_types, past_days=past_days)
+    scrape_and_store_properties(tasks=plan, past_days=past_days, replay=replay)
     
-    return {"message": "Scraper job completed.", "locations_count": len(locations)}
+    return {"message": "Scraper job completed.", "locations_count": len(plan)}
 
 @router.post("/backfill-gis")
 def backfill_gis(
@@ -59,19 +67,21 @@ def backfill_gis(
     return {"message": "GIS Backfill started in background."}
 
 @router.post("/seed-zones")
-async def seed_zones(
+def seed_zones(
     file: UploadFile = File(...),
+    for_user: bool = False,
     current_user: User = Depends(get_current_user)
 ):
     """
     Seed Hunter Zones from an uploaded GeoJSON file.
+    Pass `for_user=true` to replace only the caller's own zones.
+    The upload is parsed feature by feature, so large files seed in bounded memory.
     """
     try:
-        content = await file.read()
-        geojson_data = json.loads(content)
+        features = AdminService.iter_geojson_features(file.file)
         
         with Session(engine) as session:
-            count = AdminService.seed_zones_from_geojson(geojson_data, session)
+            count = AdminService.seed_zones_from_features(features, session, user_id=current_user.id if for_user else None)
             
         return {"message": f"Successfully seeded {count} zones."}
     except Exception as e:
@@ -86,7 +96,11 @@ def generate_zones(
     """
     Generate zones using Valhalla and update the database.
     Runs in background as it involves external API call and DB backfill.
+    With several `origins`, each tier is the intersection (or union) of their isochrones.
     """
+    if not request.origins and (request.lat is None or request.lon is None):
+        raise HTTPException(status_code=400, detail="Provide either lat/lon or origins.")
+
     def _generation_task():
         with Session(engine) as session:
             try:
@@ -98,7 +112,10 @@ def generate_zones(
                     lon=request.lon,
                     contours=sorted_contours,
                     valhalla_url=request.valhalla_url,
-                    costing=request.costing
+                    costing=request.costing,
+                    origins=[(o.lat, o.lon) for o in request.origins] if request.origins else None,
+                    combine=request.combine,
+                    user_id=current_user.id if request.for_user else None
                 )
             except Exception as e:
                 # In a real app we might want to store job status
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException, Depends
+from sqlmodel import Session
+from typing import Optional
+
+from app.core.models import User
+from app.api.deps import get_session, get_current_user
+from app.services.analytics import AnalyticsService
+
+router = APIRouter()
+
+@router.get("/weekly-prices")
+def get_weekly_prices(
+    weeks: int = 12,
+    county: Optional[str] = None,
+    tier: Optional[str] = None,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Median list price (and price per sqft) of new listings by week, GIS tier and county.
+    """
+    try:
+        return AnalyticsService.weekly_prices(session, weeks=weeks, county=county, tier=tier)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/days-to-pending")
+def get_days_to_pending(
+    county: Optional[str] = None,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Days from first seen to first pending status, by county and GIS tier.
+    """
+    try:
+        return AnalyticsService.days_to_pending(session, county=county)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlmodel import Session, select
-from typing import List, Any
+from typing import List, Any, Optional, Tuple
 from uuid import UUID
-from sqlalchemy import func
-from geoalchemy2.shape import to_shape
+import numpy as np
 
 from app.core.database import engine
-from app.core.models import PropertyListing, PropertyChangeLog, User
+from app.core.config import AppConfig
+from app.core.models import PropertyChangeLog, User, UserSettings
 from app.api.deps import get_session, get_current_user
+from app.services.zones import ZoneService
+from app.services.change_log import ChangeLogService
+from app.services.listing_snapshot import ListingSnapshot, TIERS
+from app.services.archive import ArchiveService
+from app.services.ranking import RankingEngine
+from app.services.scrape_planner import ScrapePlanner
+from app.services.search import ListingSearch
+from app.services.clusters import ListingClusters
 
 router = APIRouter()
 
@@ -15,47 +23,259 @@ def get_session():
     with Session(engine) as session:
         yield session
 
+def parse_bbox(bbox: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Parses "west,south,east,north" into a tuple.
+    """
+    if not bbox:
+        return None
+    try:
+        west, south, east, north = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise ValueError("bbox must be 'west,south,east,north'")
+    return west, south, east, north
+
 @router.get("/", response_model=List[Any])
 def get_properties(
+    include_delisted: bool = False,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_beds: Optional[float] = None,
+    min_baths: Optional[float] = None,
+    min_sqft: Optional[float] = None,
+    tier: Optional[List[str]] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    bbox: Optional[str] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    mine: bool = False,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get all active properties with their GIS info.
+    Users with their own zones get tiers from those zones instead of the global set.
+    Delisted listings are left out unless `include_delisted=true`.
+
+    Served from the in-memory listing snapshot: filters, `bbox` ("west,south,east,north")
+    and `sort` (e.g. "price" or "-created_at") are vectorized masks, not SQL.
+    `mine=true` limits results to the user's scrape locations and price ceiling.
     """
     try:
-        # Select specific fields to keep payload light
-        statement = select(PropertyListing)
-        results = session.exec(statement).all()
-        
-        # Fetch history mapping
-        history_stmt = select(PropertyChangeLog.property_id, func.max(PropertyChangeLog.timestamp)).group_by(PropertyChangeLog.property_id)
-        history_results = session.exec(history_stmt).all()
-        history_map = {str(row[0]): row[1] for row in history_results}
-        
+        box = parse_bbox(bbox)
+        snapshot = ListingSnapshot.current()
+        locations = None
+        if mine:
+            scope = ScrapePlanner.scope_for_user(session, current_user.id)
+            locations = scope["locations"]
+            max_price = scope["price_max"] if max_price is None else min(max_price, scope["price_max"])
+
+        tier_codes, contours = None, None
+        if ZoneService.user_has_zones(session, current_user.id):
+            tier_codes, contours = snapshot.user_tiers(ZoneService.user_tiers(session, current_user.id))
+
+        mask = snapshot.filter(
+            include_delisted=include_delisted,
+            min_price=min_price,
+            max_price=max_price,
+            min_beds=min_beds,
+            min_baths=min_baths,
+            min_sqft=min_sqft,
+            tiers=tier,
+            statuses=status,
+            bbox=box,
+            tier_codes=tier_codes,
+            locations=locations,
+        )
+        rows = snapshot.order(mask, sort, contours)
+        rows = rows[offset:offset + limit] if limit is not None else rows[offset:]
+
+        if tier_codes is None:
+            return [snapshot.records[i] for i in rows]
+
         properties = []
-        for prop in results:
-            # Convert GeoAlchemy element to Shapely point then to lat/lon
-            point = to_shape(prop.location)
-            
-            properties.append({
-                "id": str(prop.id),
-                "address": prop.address,
-                "price": prop.price,
-                "beds": prop.beds,
-                "baths": prop.baths,
-                "sqft": prop.sqft,
-                "status": prop.status,
-                "property_url": prop.property_url,
-                "gis_tier": prop.gis_tier,
-                "gis_contour": prop.gis_contour,
-                "lat": point.y,
-                "lon": point.x,
-                "primary_image_url": prop.primary_image_url,
-                "created_at": prop.created_at,
-                "latest_change": history_map.get(str(prop.id))
-            })
+        for i in rows:
+            record = dict(snapshot.records[i])
+            record["gis_tier"] = TIERS[tier_codes[i]] if tier_codes[i] >= 0 else None
+            record["gis_contour"] = int(contours[i]) if not np.isnan(contours[i]) else None
+            properties.append(record)
         return properties
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/clusters")
+def get_property_clusters(
+    zoom: int = Query(..., ge=0, le=20),
+    bbox: Optional[str] = None,
+    include_delisted: bool = False,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get listings aggregated into grid cells for map zoom `zoom`: count, centroid,
+    median price and best tier per cell. Pass `bbox` ("west,south,east,north") to get
+    only the visible cells. Grids are cached per snapshot version and zoom.
+    """
+    try:
+        box = parse_bbox(bbox)
+        snapshot = ListingSnapshot.current()
+
+        tier_codes, tier_key = None, None
+        if ZoneService.user_has_zones(session, current_user.id):
+            tier_codes, _ = snapshot.user_tiers(ZoneService.user_tiers(session, current_user.id))
+            tier_key = str(current_user.id)
+
+        cells = ListingClusters.clusters(snapshot, zoom, box, include_delisted, tier_codes, tier_key)
+        return {"zoom": zoom, "cell_size": ListingClusters.cell_size(zoom), "cells": cells}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/ranked", response_model=List[Any])
+def get_ranked_properties(
+    k: Optional[int] = Query(None, ge=1, le=1000),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the user's top `k` active listings by weighted score over price tier, zone
+    contour, beds, baths, sqft and recency. Each item carries its `score` (0-1).
+
+    Thresholds and weights come from the user's settings (`price_tiers`,
+    `isochrone_settings`, `ranking_weights`), falling back to config.yaml. Only listings
+    in the user's scrape locations and under their price ceiling are ranked.
+    """
+    try:
+        snapshot = ListingSnapshot.current()
+        settings = session.exec(select(UserSettings).where(UserSettings.user_id == current_user.id)).first()
+
+        tier_codes, contours = None, None
+        if ZoneService.user_has_zones(session, current_user.id):
+            tier_codes, contours = snapshot.user_tiers(ZoneService.user_tiers(session, current_user.id))
+
+        rows, scores = RankingEngine.rank(
+            snapshot,
+            current_user.id,
+            k or AppConfig.get_ranking_settings().get("default_k", 50),
+            contours=contours,
+            price_tiers=settings.price_tiers if settings else None,
+            isochrone_settings=settings.isochrone_settings if settings else None,
+            ranking_weights=settings.ranking_weights if settings else None,
+            scope=ScrapePlanner.user_scope(settings),
+        )
+        return RankingEngine.records(snapshot, rows, scores, tier_codes, contours)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/search", response_model=List[Any])
+def search_properties(
+    q: str = Query(..., min_length=2),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    include_delisted: bool = False,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Fuzzy search by street address or MLS number, best match first.
+    Each item carries its match `score` (0-1).
+    """
+    try:
+        return ListingSearch.search(
+            session,
+            q,
+            limit=limit,
+            user_id=current_user.id,
+            has_zones=ZoneService.user_has_zones(session, current_user.id),
+            include_delisted=include_delisted,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/near", response_model=List[Any])
+def get_nearest_properties(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    k: Optional[int] = Query(None, ge=1, le=500),
+    include_delisted: bool = False,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_beds: Optional[float] = None,
+    min_baths: Optional[float] = None,
+    min_sqft: Optional[float] = None,
+    tier: Optional[List[str]] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the `k` listings nearest to (lat, lon), nearest first, each with `distance_m`.
+    Takes the same attribute filters as GET /properties.
+    """
+    try:
+        return ListingSearch.near(
+            session, lat, lon, k,
+            user_id=current_user.id,
+            has_zones=ZoneService.user_has_zones(session, current_user.id),
+            include_delisted=include_delisted,
+            min_price=min_price,
+            max_price=max_price,
+            min_beds=min_beds,
+            min_baths=min_baths,
+            min_sqft=min_sqft,
+            tiers=tier,
+            statuses=status,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/within", response_model=List[Any])
+def get_properties_within(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=500),
+    polygon: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+    include_delisted: bool = False,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_beds: Optional[float] = None,
+    min_baths: Optional[float] = None,
+    min_sqft: Optional[float] = None,
+    tier: Optional[List[str]] = Query(None),
+    status: Optional[List[str]] = Query(None),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get listings within `radius_km` of (lat, lon), nearest first with `distance_m`, or
+    inside `polygon` (a GeoJSON Polygon/MultiPolygon). Takes the same attribute filters
+    as GET /properties.
+    """
+    try:
+        return ListingSearch.within(
+            session,
+            lat=lat,
+            lon=lon,
+            radius_km=radius_km,
+            polygon=polygon,
+            limit=limit,
+            user_id=current_user.id,
+            has_zones=ZoneService.user_has_zones(session, current_user.id),
+            include_delisted=include_delisted,
+            min_price=min_price,
+            max_price=max_price,
+            min_beds=min_beds,
+            min_baths=min_baths,
+            min_sqft=min_sqft,
+            tiers=tier,
+            statuses=status,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -76,3 +296,36 @@ def get_property_history(
         return history
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{property_id}/history/summary")
+def get_property_history_summary(
+    property_id: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get monthly change summaries for a property, covering history past the
+    change log's retention window.
+    """
+    try:
+        return ChangeLogService.summaries(session, UUID(property_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Declared last so the catch-all path doesn't shadow the fixed routes above
+@router.get("/{property_id}")
+def get_property(
+    property_id: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get a single property, whether it is active or archived.
+    """
+    try:
+        listing = ArchiveService.get_listing(session, UUID(property_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not listing:
+        raise HTTPException(status_code=404, detail="Property not found")
+    return listing
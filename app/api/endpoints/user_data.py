@@ -17,6 +17,9 @@ class InteractionUpdate(BaseModel):
 
 class SettingsUpdate(BaseModel):
     max_scrape_price: Optional[int] = None
+    price_tiers: Optional[Dict[str, int]] = None
+    isochrone_settings: Optional[Dict[str, Any]] = None
+    ranking_weights: Optional[Dict[str, float]] = None
     # Add other fields as needed
 
 class SyncRequest(BaseModel):
@@ -67,6 +70,12 @@ def sync_user_data(req: SyncRequest, session: Session = Depends(get_session)):
          if settings:
              if req.settings.max_scrape_price is not None:
                  settings.max_scrape_price = req.settings.max_scrape_price
+             if req.settings.price_tiers is not None:
+                 settings.price_tiers = req.settings.price_tiers
+             if req.settings.isochrone_settings is not None:
+                 settings.isochrone_settings = req.settings.isochrone_settings
+             if req.settings.ranking_weights is not None:
+                 settings.ranking_weights = req.settings.ranking_weights
              session.add(settings)
     
     session.commit()
@@ -35,10 +35,10 @@ def get_zone(lat: float, lon: float, session: Session = Depends(get_session)):
 @router.get("/")
 def get_zones(session: Session = Depends(get_session)):
     """
-    Get all Hunter Zones as GeoJSON
+    Get the global Hunter Zones as GeoJSON
     """
     try:
-        zones = session.exec(select(HunterZone)).all()
+        zones = session.exec(select(HunterZone).where(HunterZone.user_id.is_(None))).all()
         
         features = []
         for zone in zones:
@@ -0,0 +1,10 @@
+# Common USPS abbreviations so "123 North Main Street" and "123 N Main St" normalize alike.
+# Shared by EntityResolver.normalize_addresses and its SQL twin, normalize_address().
+ADDRESS_ABBREVIATIONS = {
+    "street": "st", "avenue": "ave", "road": "rd", "drive": "dr", "lane": "ln", "court": "ct",
+    "circle": "cir", "boulevard": "blvd", "place": "pl", "terrace": "ter", "parkway": "pkwy",
+    "highway": "hwy", "route": "rte", "trail": "trl", "square": "sq", "mountain": "mtn",
+    "north": "n", "south": "s", "east": "e", "west": "w",
+    "northeast": "ne", "northwest": "nw", "southeast": "se", "southwest": "sw",
+    "apartment": "unit", "apt": "unit", "suite": "unit", "ste": "unit",
+}
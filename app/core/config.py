@@ -9,6 +9,10 @@ class AppConfig:
     _config: Dict[str, Any] = None
     _config_path: str = "config.yaml"
 
+    @staticmethod
+    def get_base_dir() -> str:
+        return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
     @classmethod
     def load(cls):
         """
@@ -16,7 +20,7 @@ class AppConfig:
         """
         try:
             # Look for config in root directory
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            base_dir = cls.get_base_dir()
             config_path = os.path.join(base_dir, cls._config_path)
             
             with open(config_path, 'r') as f:
@@ -39,12 +43,78 @@ class AppConfig:
             cls.load()
         return cls._config.get('scheduler', {}).get('interval_hours', 3)
 
+    @classmethod
+    def get_coordination_settings(cls) -> Dict[str, Any]:
+        if not cls._config:
+            cls.load()
+        return cls._config.get('coordination', {})
+
     @classmethod
     def get_scraper_settings(cls) -> Dict[str, Any]:
         if not cls._config:
             cls.load()
         return cls._config.get('scraper', {})
 
+    @classmethod
+    def get_zillow_settings(cls) -> Dict[str, Any]:
+        if not cls._config:
+            cls.load()
+        return cls._config.get('zillow', {})
+
+    @classmethod
+    def get_scrape_cache_settings(cls) -> Dict[str, Any]:
+        if not cls._config:
+            cls.load()
+        return cls._config.get('scrape_cache', {})
+
+    @classmethod
+    def get_valhalla_settings(cls) -> Dict[str, Any]:
+        if not cls._config:
+            cls.load()
+        return cls._config.get('valhalla', {})
+
+    @classmethod
+    def get_change_log_settings(cls) -> Dict[str, Any]:
+        if not cls._config:
+            cls.load()
+        return cls._config.get('change_log', {})
+
+    @classmethod
+    def get_archive_settings(cls) -> Dict[str, Any]:
+        if not cls._config:
+            cls.load()
+        return cls._config.get('archive', {})
+
+    @classmethod
+    def get_snapshot_settings(cls) -> Dict[str, Any]:
+        if not cls._config:
+            cls.load()
+        return cls._config.get('snapshot', {})
+
+    @classmethod
+    def get_cluster_settings(cls) -> Dict[str, Any]:
+        if not cls._config:
+            cls.load()
+        return cls._config.get('clusters', {})
+
+    @classmethod
+    def get_search_settings(cls) -> Dict[str, Any]:
+        if not cls._config:
+            cls.load()
+        return cls._config.get('search', {})
+
+    @classmethod
+    def get_price_tiers(cls) -> Dict[str, int]:
+        if not cls._config:
+            cls.load()
+        return cls._config.get('pricing', {}).get('tiers', {})
+
+    @classmethod
+    def get_ranking_settings(cls) -> Dict[str, Any]:
+        if not cls._config:
+            cls.load()
+        return cls._config.get('ranking', {})
+
     @classmethod
     def get_zone_tiers(cls) -> Dict[str, int]:
         if not cls._config:
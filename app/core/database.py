@@ -1,37 +1,343 @@
 import os
+from typing import List
 from sqlmodel import create_engine, SQLModel, Session, text
 from dotenv import load_dotenv
 
+from app.core.addresses import ADDRESS_ABBREVIATIONS
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 engine = create_engine(DATABASE_URL)
 
+# SQL twin of EntityResolver.normalize_addresses, so stored and queried addresses agree.
+# IMMUTABLE because the generated address_normalized column is built from it.
+NORMALIZE_ADDRESS_SQL = r"""
+CREATE OR REPLACE FUNCTION normalize_address(p_address text)
+RETURNS text AS $$
+DECLARE
+    normalized text := lower(coalesce(p_address, ''));
+    pair text[];
+BEGIN
+    normalized := regexp_replace(replace(normalized, '#', ' unit '), '[^a-z0-9 ]', ' ', 'g');
+    FOREACH pair SLICE 1 IN ARRAY ARRAY[%s] LOOP
+        normalized := regexp_replace(normalized, '\m' || pair[1] || '\M', pair[2], 'g');
+    END LOOP;
+    RETURN btrim(regexp_replace(normalized, '\s+', ' ', 'g'));
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+""" % ", ".join(
+    f"['{word}', '{abbreviation}']"
+    for word, abbreviation in sorted(ADDRESS_ABBREVIATIONS.items(), key=lambda item: len(item[0]), reverse=True)
+)
+
+# create_all() only creates missing tables, so columns added to existing tables are listed here
+COLUMN_MIGRATIONS = [
+    "ALTER TABLE zillow_regions ADD COLUMN IF NOT EXISTS north double precision",
+    "ALTER TABLE zillow_regions ADD COLUMN IF NOT EXISTS south double precision",
+    "ALTER TABLE zillow_regions ADD COLUMN IF NOT EXISTS east double precision",
+    "ALTER TABLE zillow_regions ADD COLUMN IF NOT EXISTS west double precision",
+    "ALTER TABLE property_listings ADD COLUMN IF NOT EXISTS county varchar",
+    "CREATE INDEX IF NOT EXISTS ix_property_listings_county ON property_listings (county)",
+    "ALTER TABLE property_listings ADD COLUMN IF NOT EXISTS search_location varchar",
+    "ALTER TABLE property_listings ADD COLUMN IF NOT EXISTS last_seen_at timestamp with time zone",
+    # create_all used to make last_seen_at a naive timestamp holding UTC values. Views over
+    # the column block the type change; init_db recreates them (and the analytics views) below.
+    """
+    DO $$
+    DECLARE
+        tbl text;
+    BEGIN
+        FOREACH tbl IN ARRAY ARRAY['property_listings', 'property_listings_archive'] LOOP
+            IF EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = tbl AND column_name = 'last_seen_at' AND data_type = 'timestamp without time zone'
+            ) THEN
+                DROP VIEW IF EXISTS property_listings_all CASCADE;
+                EXECUTE format('ALTER TABLE %I ALTER COLUMN last_seen_at TYPE timestamp with time zone USING last_seen_at AT TIME ZONE ''utc''', tbl);
+            END IF;
+        END LOOP;
+    END $$;
+    """,
+    # The delisting sweep matches search_location case-insensitively, so the plain
+    # (search_location, last_seen_at) index it used to have is no longer read
+    "CREATE INDEX IF NOT EXISTS ix_property_listings_lower_search_location_last_seen_at ON property_listings (lower(search_location), last_seen_at)",
+    "DROP INDEX IF EXISTS ix_property_listings_search_location_last_seen_at",
+    "ALTER TABLE user_settings ADD COLUMN IF NOT EXISTS ranking_weights jsonb",
+    # Fuzzy address / MLS search (ListingSearch); pg_trgm is created in init_db
+    NORMALIZE_ADDRESS_SQL,
+    "ALTER TABLE property_listings ADD COLUMN IF NOT EXISTS address_normalized text GENERATED ALWAYS AS (normalize_address(address)) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_property_listings_address_normalized_trgm ON property_listings USING gin (address_normalized gin_trgm_ops)",
+    # MLS number search goes by mls_id; mls only holds the board code
+    "ALTER TABLE property_listings ADD COLUMN IF NOT EXISTS mls_id varchar",
+    "DROP INDEX IF EXISTS ix_property_listings_mls_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_property_listings_mls_id_trgm ON property_listings USING gin (mls_id gin_trgm_ops)",
+    # Metre-accurate KNN and radius queries (/properties/near, /properties/within)
+    "CREATE INDEX IF NOT EXISTS ix_property_listings_location_geog ON property_listings USING gist ((location::geography))",
+    # Archived listings leave the hot table, so history and interactions no longer reference it
+    "ALTER TABLE property_change_log DROP CONSTRAINT IF EXISTS property_change_log_property_id_fkey",
+    "ALTER TABLE user_interactions DROP CONSTRAINT IF EXISTS user_interactions_property_id_fkey",
+    # hunter_zones.geom was POLYGON; widen it once so MultiPolygon isochrones fit
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM geometry_columns
+            WHERE f_table_name = 'hunter_zones' AND f_geometry_column = 'geom' AND type = 'POLYGON'
+        ) THEN
+            ALTER TABLE hunter_zones ALTER COLUMN geom TYPE geometry(MultiPolygon, 4326) USING ST_Multi(geom);
+        END IF;
+    END $$;
+    """,
+]
+
+def listing_columns(conn, include_generated: bool = False) -> List[str]:
+    """
+    Column names of property_listings in table order. Generated columns can't be
+    inserted into, so they are left out unless asked for.
+    """
+    rows = conn.execute(text("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = 'property_listings' AND (:include_generated OR is_generated = 'NEVER')
+        ORDER BY ordinal_position
+    """), {"include_generated": include_generated})
+    return [row.column_name for row in rows]
+
 def init_db():
     with engine.connect() as conn:
-        # 1. Create PostGIS extension
+        # 1. Create PostGIS and trigram extensions
         conn.execute(text("CREATE EXTENSION IF NOT EXISTS postgis;"))
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
         conn.commit()
     
+        # 1b. A change log created before partitioning is set aside and copied in below
+        unpartitioned = conn.execute(text("""
+            SELECT 1 FROM pg_class WHERE relname = 'property_change_log' AND relkind = 'r'
+        """)).first() is not None
+        if unpartitioned:
+            conn.execute(text("ALTER TABLE property_change_log RENAME TO property_change_log_legacy"))
+            conn.execute(text("ALTER TABLE property_change_log_legacy RENAME CONSTRAINT property_change_log_pkey TO property_change_log_legacy_pkey"))
+            conn.commit()
+        # Also picks up a copy that was interrupted on a previous start
+        legacy_change_log = conn.execute(text("SELECT to_regclass('property_change_log_legacy')")).scalar() is not None
+    
     # 2. Create Tables
     SQLModel.metadata.create_all(engine)
+
+    # 2b. Add columns introduced after a table was first created
+    with engine.connect() as conn:
+        for statement in COLUMN_MIGRATIONS:
+            conn.execute(text(statement))
+        conn.commit()
     
-    # 3. Create 'Bouncer' Stored Procedure
+    # 2c. Cold storage for inactive listings, kept column-compatible with the hot table
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS property_listings_archive (LIKE property_listings INCLUDING DEFAULTS)"))
+        conn.execute(text("""
+        DO $$
+        DECLARE
+            col record;
+        BEGIN
+            FOR col IN
+                SELECT a.attname, format_type(a.atttypid, a.atttypmod) AS coltype
+                FROM pg_attribute a
+                WHERE a.attrelid = 'property_listings'::regclass AND a.attnum > 0 AND NOT a.attisdropped
+            LOOP
+                EXECUTE format('ALTER TABLE property_listings_archive ADD COLUMN IF NOT EXISTS %I %s', col.attname, col.coltype);
+            END LOOP;
+        END $$;
+        """))
+        conn.execute(text("ALTER TABLE property_listings_archive ADD COLUMN IF NOT EXISTS archived_at timestamp with time zone"))
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_property_listings_archive_id ON property_listings_archive (id)"))
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_property_listings_archive_external_id ON property_listings_archive (external_id)"))
+
+        # Read path over hot and cold rows. New listing columns are appended, so
+        # CREATE OR REPLACE keeps working with the analytics views depending on it.
+        columns = ", ".join(f'"{name}"' for name in listing_columns(conn, include_generated=True))
+        conn.execute(text(f"""
+        CREATE OR REPLACE VIEW property_listings_all AS
+        SELECT false AS is_archived, NULL::timestamp with time zone AS archived_at, {columns} FROM property_listings
+        UNION ALL
+        SELECT true AS is_archived, archived_at, {columns} FROM property_listings_archive
+        """))
+        conn.commit()
+
+    # 3. Band builder: turns one nested zone set into disjoint, subdivided bands
+    create_bands_sql = text("""
+    CREATE OR REPLACE FUNCTION rebuild_zone_bands(p_user_id uuid)
+    RETURNS integer AS $$
+    DECLARE
+        inserted integer;
+    BEGIN
+        DELETE FROM hunter_zone_bands WHERE user_id IS NOT DISTINCT FROM p_user_id;
+
+        INSERT INTO hunter_zone_bands (user_id, tier, contour, geom)
+        WITH per_contour AS (
+            SELECT hz.tier, hz.contour, ST_Union(hz.geom) AS geom
+            FROM hunter_zones hz
+            WHERE hz.user_id IS NOT DISTINCT FROM p_user_id
+            GROUP BY hz.tier, hz.contour
+        ), bands AS (
+            SELECT c.tier, c.contour,
+                   COALESCE(
+                       ST_Difference(c.geom, (SELECT ST_Union(s.geom) FROM per_contour s WHERE s.contour < c.contour)),
+                       c.geom
+                   ) AS geom
+            FROM per_contour c
+        ), pieces AS (
+            SELECT tier, contour, ST_Subdivide(geom, 64) AS geom FROM bands
+        )
+        SELECT p_user_id, tier, contour, geom
+        FROM pieces
+        WHERE ST_GeometryType(geom) = 'ST_Polygon';
+
+        GET DIAGNOSTICS inserted = ROW_COUNT;
+        RETURN inserted;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+    # 4. Create 'Bouncer' Stored Procedure
+    # Bands are disjoint, so this is one index probe; ORDER BY only breaks ties on shared edges.
     create_procedure_sql = text("""
     CREATE OR REPLACE FUNCTION match_listing_zone(lon float, lat float)
     RETURNS TABLE(tier text, contour int) AS $$
     BEGIN
         RETURN QUERY
-        SELECT hz.tier::text, hz.contour 
-        FROM hunter_zones hz
-        WHERE ST_Contains(hz.geom, ST_SetSRID(ST_MakePoint(lon, lat), 4326))
-        ORDER BY hz.contour ASC 
+        SELECT b.tier::text, b.contour
+        FROM hunter_zone_bands b
+        WHERE b.user_id IS NULL
+          AND ST_Intersects(b.geom, ST_SetSRID(ST_MakePoint(lon, lat), 4326))
+        ORDER BY b.contour ASC
         LIMIT 1;
     END;
     $$ LANGUAGE plpgsql;
     """)
+
+    # 5. Build bands for zone sets that predate the bands table
+    backfill_bands_sql = text("""
+    SELECT rebuild_zone_bands(s.user_id)
+    FROM (SELECT DISTINCT user_id FROM hunter_zones) s
+    WHERE NOT EXISTS (SELECT 1 FROM hunter_zone_bands b WHERE b.user_id IS NOT DISTINCT FROM s.user_id)
+    """)
     
+    # 6. Change-log partition maintenance. Creates any missing monthly partitions in
+    # [p_from, p_to]; rows already sitting in the default partition for a new month are
+    # moved into it, since a range can't be attached while the default holds its rows.
+    create_partitions_sql = text("""
+    CREATE OR REPLACE FUNCTION ensure_change_log_partitions(p_from timestamp, p_to timestamp)
+    RETURNS integer AS $$
+    DECLARE
+        month_start timestamp := date_trunc('month', p_from);
+        month_end timestamp;
+        part_name text;
+        created integer := 0;
+    BEGIN
+        IF to_regclass('property_change_log_default') IS NULL THEN
+            CREATE TABLE property_change_log_default PARTITION OF property_change_log DEFAULT;
+        END IF;
+
+        WHILE month_start <= p_to LOOP
+            month_end := month_start + interval '1 month';
+            part_name := 'property_change_log_' || to_char(month_start, 'YYYY_MM');
+            IF to_regclass(part_name) IS NULL THEN
+                EXECUTE format('CREATE TABLE %I (LIKE property_change_log INCLUDING DEFAULTS)', part_name);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM property_change_log_default WHERE "timestamp" >= %L AND "timestamp" < %L RETURNING *) '
+                    'INSERT INTO %I SELECT * FROM moved', month_start, month_end, part_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE property_change_log ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    part_name, month_start, month_end
+                );
+                created := created + 1;
+            END IF;
+            month_start := month_end;
+        END LOOP;
+        RETURN created;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+    # 7. Analytics views, refreshed concurrently after each scrape (AnalyticsService).
+    # They read property_listings_all so archived listings still count; views built
+    # before the archive existed are dropped and rebuilt.
+    analytics_views_sql = [
+        text("""
+        DO $$
+        DECLARE
+            mv record;
+        BEGIN
+            FOR mv IN
+                SELECT matviewname FROM pg_matviews
+                WHERE matviewname IN ('analytics_weekly_prices', 'analytics_days_to_pending')
+                  AND definition NOT LIKE '%property_listings_all%'
+            LOOP
+                EXECUTE format('DROP MATERIALIZED VIEW %I', mv.matviewname);
+            END LOOP;
+        END $$;
+        """),
+        text("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS analytics_weekly_prices AS
+        SELECT
+            date_trunc('week', pl.created_at)::date AS week,
+            COALESCE(pl.gis_tier, 'none') AS tier,
+            COALESCE(pl.county, 'unknown') AS county,
+            count(*) AS listings,
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY pl.price) AS median_price,
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY pl.price / NULLIF(pl.sqft, 0)) AS median_price_per_sqft
+        FROM property_listings_all pl
+        WHERE pl.price IS NOT NULL
+        GROUP BY 1, 2, 3
+        """),
+        text("CREATE UNIQUE INDEX IF NOT EXISTS ux_analytics_weekly_prices ON analytics_weekly_prices (week, tier, county)"),
+        text("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS analytics_days_to_pending AS
+        WITH first_pending AS (
+            SELECT property_id, min("timestamp") AS pending_at
+            FROM property_change_log
+            WHERE changes->'status'->>'new' ILIKE 'pending%'
+            GROUP BY property_id
+        ), durations AS (
+            SELECT
+                COALESCE(pl.county, 'unknown') AS county,
+                COALESCE(pl.gis_tier, 'none') AS tier,
+                EXTRACT(EPOCH FROM (fp.pending_at - pl.created_at)) / 86400.0 AS days
+            FROM first_pending fp
+            JOIN property_listings_all pl ON pl.id = fp.property_id
+        )
+        SELECT
+            county,
+            tier,
+            count(*) AS listings,
+            percentile_cont(0.25) WITHIN GROUP (ORDER BY days) AS p25_days,
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY days) AS median_days,
+            percentile_cont(0.75) WITHIN GROUP (ORDER BY days) AS p75_days
+        FROM durations
+        GROUP BY county, tier
+        """),
+        text("CREATE UNIQUE INDEX IF NOT EXISTS ux_analytics_days_to_pending ON analytics_days_to_pending (county, tier)"),
+    ]
+
     with engine.connect() as conn:
+        conn.execute(create_bands_sql)
         conn.execute(create_procedure_sql)
+        conn.execute(backfill_bands_sql)
+        conn.execute(create_partitions_sql)
+
+        start = "now() AT TIME ZONE 'utc'"
+        if legacy_change_log:
+            start = f"""COALESCE((SELECT min("timestamp") FROM property_change_log_legacy), {start})"""
+        conn.execute(text(f"SELECT ensure_change_log_partitions({start}, (now() AT TIME ZONE 'utc') + interval '2 months')"))
+
+        if legacy_change_log:
+            conn.execute(text("""
+                INSERT INTO property_change_log (id, property_id, "timestamp", changes)
+                SELECT id, property_id, "timestamp", changes FROM property_change_log_legacy
+            """))
+            conn.execute(text("DROP TABLE property_change_log_legacy"))
+
+        for statement in analytics_views_sql:
+            conn.execute(statement)
         conn.commit()
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional, Any, Dict, List
 from uuid import UUID, uuid4
 from sqlmodel import SQLModel, Field
-from sqlalchemy import Column
+from sqlalchemy import Column, DateTime, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from geoalchemy2 import Geometry
 
@@ -18,6 +18,21 @@ class HunterZone(HunterBase, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     user_id: Optional[UUID] = Field(foreign_key="users.id", index=True)
     # Critical: GeoAlchemy2 Geometry
+    # Kept as uploaded/generated (made valid) for display; lookups use hunter_zone_bands
+    geom: Any = Field(sa_column=Column(Geometry("MULTIPOLYGON", srid=4326)))
+
+    class Config:
+        arbitrary_types_allowed = True
+
+class HunterZoneBand(HunterBase, table=True):
+    __tablename__ = "hunter_zone_bands"
+
+    # Disjoint, subdivided pieces of a zone set: gold, silver minus gold, bronze minus silver.
+    # Rebuilt by rebuild_zone_bands() whenever the set changes; used for point lookups.
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: Optional[UUID] = Field(default=None, foreign_key="users.id", index=True)
+    tier: str
+    contour: int
     geom: Any = Field(sa_column=Column(Geometry("POLYGON", srid=4326)))
 
     class Config:
@@ -41,10 +56,17 @@ class PropertyListing(HunterBase, table=True):
     property_url: Optional[str] = None
     primary_image_url: Optional[str] = None
     alt_images: Optional[List[str]] = Field(default=None, sa_column=Column(JSONB))
+    # MLS board / source code (e.g. "CAAR") and the listing's number on that MLS
     mls: Optional[str] = None
+    mls_id: Optional[str] = None
     price_tier: Optional[str] = None
     gis_tier: Optional[str] = None
     gis_contour: Optional[int] = None
+    county: Optional[str] = Field(default=None, index=True)
+    # Stamped on every upsert; listings not seen for a while are swept to 'delisted'
+    search_location: Optional[str] = None
+    # timestamptz, compared against now() by the sweep and the archiver
+    last_seen_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True)))
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -56,14 +78,46 @@ class PropertyListing(HunterBase, table=True):
     class Config:
         arbitrary_types_allowed = True
 
+class UserListingTier(HunterBase, table=True):
+    __tablename__ = "user_listing_tiers"
+
+    # Materialized tier of each listing against one user's own zones.
+    # Listings outside all of the user's zones have no row.
+    user_id: UUID = Field(foreign_key="users.id", primary_key=True)
+    property_id: UUID = Field(foreign_key="property_listings.id", primary_key=True, index=True)
+    tier: str
+    contour: int
+
 class PropertyChangeLog(HunterBase, table=True):
     __tablename__ = "property_change_log"
+    # Monthly range partitions plus a default one; see ChangeLogService.
+    # The partition key has to be part of the primary key.
+    __table_args__ = (
+        Index("ix_property_change_log_property_id_timestamp", "property_id", "timestamp"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
-    property_id: UUID = Field(foreign_key="property_listings.id")
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    # No FK: the listing may have moved to property_listings_archive
+    property_id: UUID
+    timestamp: datetime = Field(default_factory=datetime.utcnow, primary_key=True)
     changes: Dict[str, Any] = Field(sa_column=Column(JSONB))
 
+class PropertyChangeSummary(HunterBase, table=True):
+    __tablename__ = "property_change_summaries"
+
+    # Per-property, per-month rollup of change-log partitions past retention
+    property_id: UUID = Field(primary_key=True)
+    month: datetime = Field(primary_key=True)
+    change_count: int
+    first_change_at: datetime
+    last_change_at: datetime
+    first_price: Optional[float] = None
+    last_price: Optional[float] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    statuses: Optional[List[str]] = Field(default=None, sa_column=Column(JSONB))
+
 
 class User(HunterBase, table=True):
     __tablename__ = "users"
@@ -77,7 +131,8 @@ class UserInteraction(HunterBase, table=True):
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     user_id: UUID = Field(foreign_key="users.id", index=True)
-    property_id: UUID = Field(foreign_key="property_listings.id", index=True)
+    # No FK: the listing may have moved to property_listings_archive
+    property_id: UUID = Field(index=True)
     
     is_favorite: bool = Field(default=False)
     is_rejected: bool = Field(default=False)
@@ -100,4 +155,31 @@ class UserSettings(HunterBase, table=True):
     
     price_tiers: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
     isochrone_settings: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
-
+    # Per-component weights for /properties/ranked, e.g. {"price_tier": 3, "sqft": 1}
+    ranking_weights: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
+
+
+
+class ScraperReplica(HunterBase, table=True):
+    __tablename__ = "scraper_replicas"
+
+    replica_id: str = Field(primary_key=True)
+    hostname: str
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    last_heartbeat: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+class ZillowRegion(HunterBase, table=True):
+    __tablename__ = "zillow_regions"
+
+    # Location string exactly as configured, e.g. "Albemarle County, VA"
+    location: str = Field(primary_key=True)
+    # NULL region_id marks a negative (unresolvable) cache entry
+    region_id: Optional[int] = None
+    region_type: Optional[int] = None
+    display_name: Optional[str] = None
+    # Region bounding box as reported by Zillow search, used as the root tile
+    north: Optional[float] = None
+    south: Optional[float] = None
+    east: Optional[float] = None
+    west: Optional[float] = None
+    resolved_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,17 +1,25 @@
 import json
 import logging
-import requests
-from typing import List, Dict, Any, Optional
-from sqlmodel import Session, select, text
-from shapely.geometry import shape
-from geoalchemy2.shape import from_shape, to_shape
-from app.core.database import engine
-from app.core.models import HunterZone, PropertyListing
+from functools import reduce
+from typing import List, Dict, Any, Optional, Tuple, BinaryIO, Iterable, Iterator
+import ijson
+from uuid import UUID
+from sqlmodel import Session, select
+from shapely.geometry import shape, mapping
+from shapely.ops import unary_union
+from geoalchemy2.shape import to_shape
+from app.core.models import PropertyListing
 from app.services.gis import GISService
+from app.services.valhalla import ValhallaClient
+from app.services.zones import ZoneService
 from app.core.config import AppConfig
 
 logger = logging.getLogger(__name__)
 
+# ijson prefixes where a Feature can start: in a FeatureCollection, in a list of
+# features, or in a FeatureCollection inside a list
+GEOJSON_FEATURE_PREFIXES = ("features.item", "item.features.item", "item")
+
 class AdminService:
     @staticmethod
     def backfill_gis_data(session: Session):
@@ -50,13 +58,11 @@ class AdminService:
         return updated_count
 
     @staticmethod
-    def seed_zones_from_geojson(geojson_content: Dict[str, Any], session: Session):
+    def seed_zones_from_geojson(geojson_content: Dict[str, Any], session: Session, user_id: Optional[UUID] = None):
         """
         Parses GeoJSON content and seeds the HunterZone table.
-        Truncates existing zones.
+        Replaces the global zone set, or `user_id`'s own zones when given.
         """
-        logger.info("Seeding zones from GeoJSON...")
-        
         features = []
         # Handle FeatureCollection or list of features
         if isinstance(geojson_content, dict):
@@ -71,96 +77,142 @@ class AdminService:
              else:
                  features = geojson_content # Assume list of features
 
-        zones_to_insert = []
+        return AdminService.seed_zones_from_features(features, session, user_id)
 
-        for feature in features:
-            props = feature.get('properties', {})
-            contour = props.get('contour')
-            
-            if contour is None:
-                continue
-                
-            contour = int(contour)
-
-            # Tier Logic (same as script)
-            # Tier Logic (from config)
-            # Default thresholds if not in config
-            tiers_config = AppConfig.get_zone_tiers()
-            gold_thresh = tiers_config.get('gold', 40)
-            silver_thresh = tiers_config.get('silver', 60)
-            bronze_thresh = tiers_config.get('bronze', 75)
-            
-            tier = None
-            if contour <= gold_thresh:
-                tier = 'gold'
-            elif contour <= silver_thresh:
-                tier = 'silver'
-            elif contour <= bronze_thresh:
-                tier = 'bronze'
-            else:
+    @staticmethod
+    def iter_geojson_features(fileobj: BinaryIO) -> Iterator[Dict[str, Any]]:
+        """
+        Streams features out of a GeoJSON file one at a time, without loading the document.
+        Accepts a FeatureCollection, a list of features or a list of FeatureCollections.
+        """
+        builder, building_prefix = None, None
+        for prefix, event, value in ijson.parse(fileobj, use_float=True):
+            if builder is not None and building_prefix == 'item' and (
+                (prefix == 'item.type' and value == 'FeatureCollection')
+                or (prefix == 'item.features' and event == 'start_array')
+            ):
+                # A FeatureCollection in a list: drop it and stream its features instead
+                builder, building_prefix = None, None
                 continue
 
-            try:
-                # Parse Geometry
-                geom_shape = shape(feature['geometry'])
-                # Convert to WKBElement (srid=4326)
-                geom_wkb = from_shape(geom_shape, srid=4326)
-                
-                zone = HunterZone(
-                    tier=tier,
-                    contour=contour,
-                    geom=geom_wkb
-                )
-                zones_to_insert.append(zone)
-            except Exception as e:
-                logger.error(f"Skipping feature due to error: {e}")
+            if builder is None:
+                if event == 'start_map' and prefix in GEOJSON_FEATURE_PREFIXES:
+                    builder, building_prefix = ijson.ObjectBuilder(), prefix
+                    builder.event(event, value)
                 continue
 
-        if not zones_to_insert:
+            builder.event(event, value)
+            if event == 'end_map' and prefix == building_prefix:
+                obj, builder = builder.value, None
+                yield obj
+
+    @staticmethod
+    def seed_zones_from_features(features: Iterable[Dict[str, Any]], session: Session, user_id: Optional[UUID] = None) -> int:
+        """
+        Tiers features by their 'contour' property and swaps them in as a zone set.
+        `features` may be a stream; it is consumed once and never held in memory.
+        """
+        logger.info("Seeding zones from GeoJSON...")
+
+        # Tier Logic (from config), loaded once per upload
+        # Default thresholds if not in config
+        tiers_config = AppConfig.get_zone_tiers()
+        thresholds = [
+            ('gold', tiers_config.get('gold', 40)),
+            ('silver', tiers_config.get('silver', 60)),
+            ('bronze', tiers_config.get('bronze', 75)),
+        ]
+
+        def _zones():
+            for feature in features:
+                props = feature.get('properties') or {}
+                contour = props.get('contour')
+                if contour is None:
+                    continue
+                contour = int(contour)
+
+                tier = next((name for name, limit in thresholds if contour <= limit), None)
+                if tier is None:
+                    continue
+
+                try:
+                    # Parse Geometry
+                    geom_shape = shape(feature['geometry'])
+                except Exception as e:
+                    logger.error(f"Skipping feature due to error: {e}")
+                    continue
+                yield {"tier": tier, "contour": contour, "geom": geom_shape}
+
+        stats = ZoneService.replace_zones(session, _zones(), user_id)
+        if not stats['zones']:
             logger.warning("No valid zones found to insert.")
             return 0
 
-        # Truncate existing zones
-        session.exec(text("TRUNCATE TABLE hunter_zones CASCADE;"))
-        
-        # Insert new zones
-        session.add_all(zones_to_insert)
-        session.commit()
-        
-        count = len(zones_to_insert)
-        logger.info(f"Done. Inserted {count} zones.")
-        return count
+        logger.info(f"Done. Inserted {stats['zones']} zones, re-tiered {stats['retiered']} listings.")
+        return stats['zones']
+
+    @staticmethod
+    def _combine_isochrones(responses: List[Dict[str, Any]], combine: str) -> Dict[str, Any]:
+        """
+        Merges per-origin isochrone FeatureCollections into one feature per contour.
+        """
+        if len(responses) == 1:
+            return responses[0]
+
+        shapes_by_contour: Dict[int, list] = {}
+        for data in responses:
+            for feature in data.get('features', []):
+                contour_val = feature.get('properties', {}).get('contour')
+                if contour_val is None:
+                    continue
+                shapes_by_contour.setdefault(int(contour_val), []).append(shape(feature['geometry']).buffer(0))
+
+        features = []
+        for contour, shapes in shapes_by_contour.items():
+            if combine == "intersection" and len(shapes) < len(responses):
+                # Some origin has no polygon for this contour, so nothing satisfies all of them
+                continue
+            if combine == "union":
+                merged = unary_union(shapes)
+            else:
+                merged = reduce(lambda a, b: a.intersection(b), shapes)
+            if merged.is_empty:
+                logger.warning(f"Combined isochrone for contour {contour} is empty. Skipping.")
+                continue
+            features.append({"type": "Feature", "properties": {"contour": contour}, "geometry": mapping(merged)})
+
+        return {"type": "FeatureCollection", "features": features}
 
     @staticmethod
     def generate_zones_from_valhalla(
         session: Session,
-        lat: float,
-        lon: float,
+        lat: Optional[float],
+        lon: Optional[float],
         contours: List[int], # e.g. [15, 30, 45]
-        valhalla_url: str = "https://valhalla1.openstreetmap.de/isochrone",
-        costing: str = "auto"
+        valhalla_url: Optional[str] = None, # Defaults to valhalla.url in config.yaml
+        costing: str = "auto",
+        origins: Optional[List[Tuple[float, float]]] = None, # [(lat, lon), ...] for multi-commute zones
+        combine: str = "intersection",
+        user_id: Optional[UUID] = None # Generate this user's own zones instead of the global set
     ) -> int:
         """
         Calls Valhalla Isochrone API, parses response, seeds zones, and triggers backfill.
+        With several origins, each tier's isochrones are combined into one geometry:
+        'intersection' keeps areas within the contour of every origin, 'union' of any.
         """
-        logger.info(f"Requests Valhalla Isochrones at {lat}, {lon} with contours {contours}")
-
-        # 1. Prepare Request
-        # Valhalla expects contours in minutes
-        contest_list = [{"time": c} for c in contours]
-        
-        payload = {
-            "locations": [{"lat": lat, "lon": lon}],
-            "costing": costing,
-            "contours": contest_list,
-            "polygons": True
-        }
+        if not origins:
+            if lat is None or lon is None:
+                raise ValueError("Either lat/lon or origins must be provided")
+            origins = [(lat, lon)]
+        if combine not in ("intersection", "union"):
+            raise ValueError(f"Unknown combine policy '{combine}'")
+        logger.info(f"Requests Valhalla Isochrones at {origins} with contours {contours} ({combine})")
 
         try:
-            # 2. Call API
-            resp = requests.post(valhalla_url, json=payload, timeout=30)
-            resp.raise_for_status()
-            data = resp.json()
+            # 1-2. Fetch isochrones per origin (served from the on-disk cache when already fetched)
+            client = ValhallaClient(valhalla_url=valhalla_url, costing=costing)
+            responses = client.isochrones_many(origins, contours)
+            data = AdminService._combine_isochrones(responses, combine)
             
             # 3. Seed Zones (Reuse logic)
             # note: Valhalla returns a FeatureCollection. 
@@ -206,33 +258,19 @@ class AdminService:
                     logger.warning(f"Contour {contour_int} not in map {tier_map}. Skipping.")
                     continue
                     
+                # Polygon or MultiPolygon (e.g. combined commutes); stored as MultiPolygon
                 geom_shape = shape(feature['geometry'])
-                geom_wkb = from_shape(geom_shape, srid=4326)
-                
-                zone = HunterZone(
-                    tier=tier,
-                    contour=contour_int,
-                    geom=geom_wkb
-                )
-                zones_to_insert.append(zone)
+                zones_to_insert.append({"tier": tier, "contour": contour_int, "geom": geom_shape})
             
             if not zones_to_insert:
                 logger.error("No valid zones parsed from Valhalla response.")
                 return 0
 
-            # Truncate and Insert
-            session.exec(text("TRUNCATE TABLE hunter_zones CASCADE;"))
-            session.add_all(zones_to_insert)
-            session.commit()
-            
-            count = len(zones_to_insert)
-            logger.info(f"Generated and inserted {count} zones from Valhalla.")
-            
-            # 4. Trigger Backfill
-            logger.info("Triggering GIS Backfill after new zones...")
-            AdminService.backfill_gis_data(session)
+            # 4. Swap the zone set in and re-tier only the listings it affects
+            stats = ZoneService.replace_zones(session, zones_to_insert, user_id)
+            logger.info(f"Generated and inserted {stats['zones']} zones from Valhalla.")
             
-            return count
+            return stats['zones']
 
         except Exception as e:
             logger.error(f"Valhalla generation failed: {e}")
@@ -0,0 +1,66 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlmodel import Session, text
+
+from app.core.database import engine
+from app.services.coordination import ReplicaCoordinator
+
+logger = logging.getLogger(__name__)
+
+class AnalyticsService:
+    """
+    Market analytics served from materialized views (created in init_db), so dashboard
+    reads never scan `property_listings` or the change log. The views are refreshed
+    CONCURRENTLY at the end of each scrape run, which keeps them readable throughout.
+    """
+    VIEWS = ("analytics_weekly_prices", "analytics_days_to_pending")
+
+    @classmethod
+    def refresh(cls):
+        """
+        Refreshes every analytics view. Skipped if another replica is already refreshing.
+        """
+        try:
+            with engine.connect() as conn:
+                locked = conn.execute(
+                    text("SELECT pg_try_advisory_lock(:ns, hashtext('analytics_refresh'))"),
+                    {"ns": ReplicaCoordinator.LOCK_NAMESPACE}
+                ).scalar()
+                if not locked:
+                    logger.info("Analytics refresh already running on another replica. Skipping.")
+                    return
+                try:
+                    for view in cls.VIEWS:
+                        conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+                        conn.commit()
+                finally:
+                    conn.execute(text("SELECT pg_advisory_unlock(:ns, hashtext('analytics_refresh'))"), {"ns": ReplicaCoordinator.LOCK_NAMESPACE})
+                    conn.commit()
+            logger.info("Analytics views refreshed.")
+        except Exception as e:
+            logger.error(f"Analytics refresh failed: {e}")
+
+    @staticmethod
+    def weekly_prices(session: Session, weeks: int = 12, county: Optional[str] = None, tier: Optional[str] = None) -> List[Dict[str, Any]]:
+        statement = text("""
+            SELECT week, tier, county, listings, median_price, median_price_per_sqft
+            FROM analytics_weekly_prices
+            WHERE week >= (current_date - make_interval(weeks => :weeks))
+              AND (CAST(:county AS text) IS NULL OR county = :county)
+              AND (CAST(:tier AS text) IS NULL OR tier = :tier)
+            ORDER BY week DESC, county, tier
+        """)
+        rows = session.exec(statement, params={"weeks": weeks, "county": county, "tier": tier})
+        return [dict(row._mapping) for row in rows]
+
+    @staticmethod
+    def days_to_pending(session: Session, county: Optional[str] = None) -> List[Dict[str, Any]]:
+        statement = text("""
+            SELECT county, tier, listings, p25_days, median_days, p75_days
+            FROM analytics_days_to_pending
+            WHERE CAST(:county AS text) IS NULL OR county = :county
+            ORDER BY county, tier
+        """)
+        rows = session.exec(statement, params={"county": county})
+        return [dict(row._mapping) for row in rows]
@@ -0,0 +1,139 @@
+import logging
+from typing import List, Optional
+
+from sqlmodel import Session, text
+
+from app.core.config import AppConfig
+from app.core.database import engine, listing_columns
+from app.services.coordination import ReplicaCoordinator
+
+logger = logging.getLogger(__name__)
+
+class ArchiveService:
+    """
+    Hot/cold split for listings. Inactive listings (sold, delisted, off-market) that
+    haven't been seen for a while move from `property_listings` to
+    `property_listings_archive`, images and all, so the hot table and its indexes stay
+    sized to current inventory. `property_listings_all` reads across both, and a listing
+    that shows up in a scrape again is restored under its original id.
+    """
+    # Insertable listing columns; the schema only changes in init_db, before first use
+    _columns: Optional[str] = None
+
+    @classmethod
+    def _column_list(cls, session: Session) -> str:
+        if cls._columns is None:
+            cls._columns = ", ".join(f'"{name}"' for name in listing_columns(session.connection()))
+        return cls._columns
+
+    @classmethod
+    def archive_inactive(cls) -> int:
+        """
+        Moves archivable listings to the archive in batches. Scheduled job; safe to run
+        on every replica since an advisory lock makes concurrent runs take turns.
+        """
+        settings = AppConfig.get_archive_settings()
+        statuses = [s.lower() for s in settings.get("statuses", ["delisted", "sold", "off_market"])]
+        after_days = settings.get("after_days", 30)
+        batch_size = settings.get("batch_size", 5000)
+
+        total = 0
+        try:
+            with Session(engine) as session:
+                columns = cls._column_list(session)
+                while True:
+                    session.exec(
+                        text("SELECT pg_advisory_xact_lock(:ns, hashtext('property_listings_archive'))"),
+                        params={"ns": ReplicaCoordinator.LOCK_NAMESPACE}
+                    )
+                    params = {"statuses": statuses, "after_days": after_days, "batch_size": batch_size}
+                    # Listings whose id or external_id is already archived would conflict;
+                    # they stay hot (and out of the batch, so they can't stall it)
+                    session.exec(text("""
+                        CREATE TEMP TABLE archive_batch ON COMMIT DROP AS
+                        SELECT pl.id FROM property_listings pl
+                        WHERE lower(pl.status) = ANY(:statuses)
+                          AND COALESCE(pl.last_seen_at, pl.created_at AT TIME ZONE 'utc') < now() - :after_days * interval '1 day'
+                          AND NOT EXISTS (SELECT 1 FROM property_listings_archive a WHERE a.id = pl.id)
+                          AND NOT EXISTS (SELECT 1 FROM property_listings_archive a WHERE a.external_id = pl.external_id)
+                        LIMIT :batch_size
+                    """), params=params)
+
+                    # Copy first and only delete what actually landed in the archive
+                    archived = [row.id for row in session.exec(text(f"""
+                        INSERT INTO property_listings_archive ({columns}, archived_at)
+                        SELECT {columns}, now() FROM property_listings
+                        WHERE id IN (SELECT id FROM archive_batch)
+                        ON CONFLICT DO NOTHING
+                        RETURNING id
+                    """)).all()]
+                    if archived:
+                        # Per-user tiers are derived data; they are recomputed on restore
+                        session.exec(text("DELETE FROM user_listing_tiers WHERE property_id = ANY(:ids)"), params={"ids": archived})
+                        session.exec(text("DELETE FROM property_listings WHERE id = ANY(:ids)"), params={"ids": archived})
+                    session.commit()
+
+                    total += len(archived)
+                    if len(archived) < batch_size:
+                        break
+        except Exception as e:
+            logger.error(f"Listing archival failed: {e}")
+
+        logger.info(f"Archived {total} inactive listings.")
+        return total
+
+    @classmethod
+    def restore(cls, session: Session, external_id_groups: List[List[str]]) -> List[str]:
+        """
+        Moves archived listings back into the hot table in one statement. Each group is
+        the URLs of one scraped listing (its own plus entity-resolution aliases); a group
+        with no hot row restores its most recently archived match.
+        Returns the restored external_ids. Does not commit.
+        """
+        groups, external_ids = [], []
+        for i, group in enumerate(external_id_groups):
+            for external_id in group:
+                groups.append(i)
+                external_ids.append(str(external_id))
+        if not external_ids:
+            return []
+
+        columns = cls._column_list(session)
+        rows = session.exec(text(f"""
+            WITH scraped AS (
+                SELECT * FROM unnest(CAST(:groups AS integer[]), CAST(:external_ids AS text[])) AS s(grp, external_id)
+            ), candidates AS (
+                SELECT DISTINCT ON (s.grp) a.id
+                FROM scraped s
+                JOIN property_listings_archive a ON a.external_id = s.external_id
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM scraped h JOIN property_listings pl ON pl.external_id = h.external_id
+                    WHERE h.grp = s.grp
+                )
+                  AND NOT EXISTS (SELECT 1 FROM property_listings pl WHERE pl.id = a.id)
+                ORDER BY s.grp, a.archived_at DESC
+            ), restored AS (
+                DELETE FROM property_listings_archive
+                WHERE id IN (SELECT id FROM candidates)
+                RETURNING *
+            )
+            INSERT INTO property_listings ({columns})
+            SELECT {columns} FROM restored
+            RETURNING external_id
+        """), params={"groups": groups, "external_ids": external_ids}).all()
+        return [row.external_id for row in rows]
+
+    @staticmethod
+    def get_listing(session: Session, property_id) -> Optional[dict]:
+        """
+        Looks a listing up in the hot table or the archive.
+        """
+        row = session.exec(text("""
+            SELECT *, ST_X(location) AS lon, ST_Y(location) AS lat
+            FROM property_listings_all WHERE id = :id
+        """), params={"id": property_id}).first()
+        if not row:
+            return None
+        listing = dict(row._mapping)
+        listing.pop("location", None)
+        return listing
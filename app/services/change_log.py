@@ -0,0 +1,123 @@
+import logging
+import re
+from datetime import datetime
+from typing import List
+from uuid import UUID
+
+from sqlmodel import Session, select, text
+
+from app.core.config import AppConfig
+from app.core.database import engine
+from app.core.models import PropertyChangeSummary
+from app.services.coordination import ReplicaCoordinator
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"^property_change_log_(\d{4})_(\d{2})$")
+
+class ChangeLogService:
+    """
+    Maintains the monthly partitions of `property_change_log`.
+
+    Partitions are created ahead of time, and partitions older than the retention window
+    are rolled up into `property_change_summaries` (one row per property per month) and
+    then dropped whole, so index and vacuum costs stay bounded by the retention window.
+    """
+
+    @staticmethod
+    def _month_floor(value: datetime, months_back: int = 0) -> datetime:
+        index = value.year * 12 + value.month - 1 - months_back
+        return datetime(index // 12, index % 12 + 1, 1)
+
+    @staticmethod
+    def partitions(session: Session) -> List[tuple]:
+        """
+        Returns (name, month_start) for every monthly partition, oldest first.
+        """
+        statement = text("""
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'property_change_log'::regclass
+        """)
+        found = []
+        for row in session.exec(statement):
+            match = PARTITION_NAME.match(row.relname)
+            if match:
+                found.append((row.relname, datetime(int(match.group(1)), int(match.group(2)), 1)))
+        return sorted(found, key=lambda item: item[1])
+
+    @staticmethod
+    def _roll_up(session: Session, partition: str, month: datetime) -> int:
+        # Re-running a month replaces its summaries, so an interrupted run is safe to repeat
+        result = session.exec(text(f"""
+            INSERT INTO property_change_summaries (
+                property_id, month, change_count, first_change_at, last_change_at,
+                first_price, last_price, min_price, max_price, statuses
+            )
+            SELECT
+                property_id,
+                :month,
+                count(*),
+                min("timestamp"),
+                max("timestamp"),
+                (array_agg((changes->'price'->>'old')::float ORDER BY "timestamp") FILTER (WHERE changes ? 'price'))[1],
+                (array_agg((changes->'price'->>'new')::float ORDER BY "timestamp" DESC) FILTER (WHERE changes ? 'price'))[1],
+                min(LEAST((changes->'price'->>'old')::float, (changes->'price'->>'new')::float)),
+                max(GREATEST((changes->'price'->>'old')::float, (changes->'price'->>'new')::float)),
+                COALESCE(jsonb_agg(DISTINCT changes->'status'->'new') FILTER (WHERE changes ? 'status'), '[]'::jsonb)
+            FROM "{partition}"
+            GROUP BY property_id
+            ON CONFLICT (property_id, month) DO UPDATE SET
+                change_count = EXCLUDED.change_count,
+                first_change_at = EXCLUDED.first_change_at,
+                last_change_at = EXCLUDED.last_change_at,
+                first_price = EXCLUDED.first_price,
+                last_price = EXCLUDED.last_price,
+                min_price = EXCLUDED.min_price,
+                max_price = EXCLUDED.max_price,
+                statuses = EXCLUDED.statuses
+        """), params={"month": month})
+        return result.rowcount
+
+    @classmethod
+    def maintain(cls):
+        """
+        Creates upcoming partitions and applies retention. Safe to run on every replica;
+        an advisory lock makes concurrent runs take turns.
+        """
+        settings = AppConfig.get_change_log_settings()
+        months_ahead = settings.get("partition_months_ahead", 2)
+        retention_months = settings.get("retention_months", 12)
+
+        try:
+            with Session(engine) as session:
+                session.exec(
+                    text("SELECT pg_advisory_xact_lock(:ns, hashtext('property_change_log'))"),
+                    params={"ns": ReplicaCoordinator.LOCK_NAMESPACE}
+                )
+                created = session.exec(text("""
+                    SELECT ensure_change_log_partitions(
+                        now() AT TIME ZONE 'utc',
+                        (now() AT TIME ZONE 'utc') + make_interval(months => :months)
+                    )
+                """), params={"months": months_ahead}).scalar()
+
+                cutoff = cls._month_floor(datetime.utcnow(), retention_months)
+                expired = [(name, month) for name, month in cls.partitions(session) if month < cutoff]
+                for name, month in expired:
+                    summaries = cls._roll_up(session, name, month)
+                    session.exec(text(f'ALTER TABLE property_change_log DETACH PARTITION "{name}"'))
+                    session.exec(text(f'DROP TABLE "{name}"'))
+                    logger.info(f"Rolled {name} up into {summaries} summaries and dropped it.")
+                session.commit()
+
+            logger.info(f"Change log maintenance: {created} partitions created, {len(expired)} expired.")
+        except Exception as e:
+            logger.error(f"Change log maintenance failed: {e}")
+
+    @staticmethod
+    def summaries(session: Session, property_id: UUID) -> List[PropertyChangeSummary]:
+        statement = select(PropertyChangeSummary).where(
+            PropertyChangeSummary.property_id == property_id
+        ).order_by(PropertyChangeSummary.month.desc())
+        return session.exec(statement).all()
@@ -0,0 +1,108 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import AppConfig
+from app.services.listing_snapshot import ListingSnapshot, TIERS
+
+logger = logging.getLogger(__name__)
+
+class ListingClusters:
+    """
+    Grid aggregation of the listing snapshot for zoomed-out map views.
+
+    At zoom `z` the world is cut into square cells of 360 / (2^z * cells_per_tile)
+    degrees, i.e. `clusters.cells_per_tile` cells across each 256px map tile. Every cell
+    reports its listing count (heatmap weight), centroid, median price and best tier.
+    The whole grid for a (snapshot version, zoom, delisted, user tiers) key is built once
+    with a vectorized group-by and cached, and `bbox` only picks cells out of it.
+    """
+    _cache: "OrderedDict[Tuple, pd.DataFrame]" = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    @staticmethod
+    def cell_size(zoom: int) -> float:
+        cells_per_tile = AppConfig.get_cluster_settings().get("cells_per_tile", 8)
+        return 360.0 / ((2 ** zoom) * cells_per_tile)
+
+    @classmethod
+    def build(cls, snapshot: ListingSnapshot, zoom: int, include_delisted: bool = False, tier_codes: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        One row per non-empty cell: ix, iy, count, lat, lon, median_price, best_tier_code.
+        """
+        rows = np.flatnonzero(snapshot.filter(include_delisted=include_delisted))
+        size = cls.cell_size(zoom)
+        tiers = (snapshot.gis_tier_codes if tier_codes is None else tier_codes)[rows].astype(np.int16)
+
+        frame = pd.DataFrame({
+            "ix": np.floor(snapshot.lon[rows] / size).astype(np.int64),
+            "iy": np.floor(snapshot.lat[rows] / size).astype(np.int64),
+            "lat": snapshot.lat[rows],
+            "lon": snapshot.lon[rows],
+            "price": snapshot.price[rows],
+            # Untiered sorts after bronze, so min() is the best tier in the cell
+            "tier": np.where(tiers < 0, len(TIERS), tiers),
+        })
+        return frame.groupby(["ix", "iy"], sort=False).agg(
+            count=("lat", "size"),
+            lat=("lat", "mean"),
+            lon=("lon", "mean"),
+            median_price=("price", "median"),
+            best_tier_code=("tier", "min"),
+        ).reset_index()
+
+    @classmethod
+    def _grid(cls, snapshot: ListingSnapshot, zoom: int, include_delisted: bool, tier_codes: Optional[np.ndarray], tier_key: Optional[str]) -> pd.DataFrame:
+        key = (snapshot.version, zoom, include_delisted, tier_key)
+        with cls._cache_lock:
+            grid = cls._cache.get(key)
+            if grid is not None:
+                cls._cache.move_to_end(key)
+                return grid
+
+        grid = cls.build(snapshot, zoom, include_delisted, tier_codes)
+        size = AppConfig.get_cluster_settings().get("cache_size", 64)
+        with cls._cache_lock:
+            cls._cache[key] = grid
+            while len(cls._cache) > size:
+                cls._cache.popitem(last=False)
+        return grid
+
+    @classmethod
+    def clusters(
+        cls,
+        snapshot: ListingSnapshot,
+        zoom: int,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        include_delisted: bool = False,
+        tier_codes: Optional[np.ndarray] = None,
+        tier_key: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Cells intersecting `bbox` (west, south, east, north), or all cells.
+        `tier_codes` overrides the global tiers; `tier_key` identifies them in the cache.
+        """
+        grid = cls._grid(snapshot, zoom, include_delisted, tier_codes, tier_key)
+        size = cls.cell_size(zoom)
+        if bbox is not None:
+            west, south, east, north = bbox
+            grid = grid[
+                (grid["ix"] >= np.floor(west / size)) & (grid["ix"] <= np.floor(east / size))
+                & (grid["iy"] >= np.floor(south / size)) & (grid["iy"] <= np.floor(north / size))
+            ]
+
+        cells = []
+        for ix, iy, count, lat, lon, median_price, best in grid.itertuples(index=False, name=None):
+            cells.append({
+                "lat": float(lat),
+                "lon": float(lon),
+                "count": int(count),
+                "median_price": None if np.isnan(median_price) else float(median_price),
+                "best_tier": TIERS[best] if best < len(TIERS) else None,
+                "bounds": [ix * size, iy * size, (ix + 1) * size, (iy + 1) * size],
+            })
+        return cells
@@ -0,0 +1,149 @@
+import bisect
+import hashlib
+import logging
+import os
+import socket
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+from uuid import uuid4
+
+from sqlmodel import Session, text
+
+from app.core.config import AppConfig
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+class ReplicaCoordinator:
+    """
+    Coordinates scrape work between replicas (uvicorn workers / containers).
+
+    Every replica heartbeats into `scraper_replicas`. Locations are split across the
+    live replicas with a consistent hash ring, and each location is additionally guarded
+    by a Postgres advisory lock so two replicas never scrape it at the same time while
+    membership is changing.
+    """
+    # First key of the two-int advisory lock form, so our locks can't collide with others.
+    LOCK_NAMESPACE = 48151
+
+    replica_id: str = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+    @classmethod
+    def heartbeat(cls):
+        """
+        Registers this replica or refreshes its heartbeat. Uses the DB clock to avoid skew.
+        """
+        statement = text("""
+            INSERT INTO scraper_replicas (replica_id, hostname, started_at, last_heartbeat)
+            VALUES (:replica_id, :hostname, now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc')
+            ON CONFLICT (replica_id) DO UPDATE SET last_heartbeat = EXCLUDED.last_heartbeat
+        """)
+        try:
+            with Session(engine) as session:
+                session.exec(statement, params={"replica_id": cls.replica_id, "hostname": socket.gethostname()})
+                session.commit()
+        except Exception as e:
+            logger.error(f"Replica heartbeat failed for {cls.replica_id}: {e}")
+
+    @classmethod
+    def deregister(cls):
+        """
+        Removes this replica so its locations are rebalanced immediately.
+        """
+        try:
+            with Session(engine) as session:
+                session.exec(text("DELETE FROM scraper_replicas WHERE replica_id = :replica_id"), params={"replica_id": cls.replica_id})
+                session.commit()
+        except Exception as e:
+            logger.error(f"Replica deregistration failed for {cls.replica_id}: {e}")
+
+    @staticmethod
+    def live_replicas(session: Session, ttl_seconds: int) -> List[str]:
+        statement = text("""
+            SELECT replica_id FROM scraper_replicas
+            WHERE last_heartbeat > (now() AT TIME ZONE 'utc') - make_interval(secs => :ttl)
+            ORDER BY replica_id
+        """)
+        return [row.replica_id for row in session.exec(statement, params={"ttl": ttl_seconds}).all()]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    @classmethod
+    def _build_ring(cls, replicas: List[str], virtual_nodes: int) -> Tuple[List[int], List[str]]:
+        ring = sorted((cls._hash(f"{replica}#{i}"), replica) for replica in replicas for i in range(virtual_nodes))
+        return [point for point, _ in ring], [replica for _, replica in ring]
+
+    @classmethod
+    def assign_locations(cls, locations: List[str], replicas: List[str], virtual_nodes: int = 64) -> Dict[str, str]:
+        """
+        Maps each location to its owning replica on a consistent hash ring.
+        Adding or removing a replica only moves the locations adjacent to its points.
+        """
+        if not replicas:
+            return {}
+
+        points, owners = cls._build_ring(replicas, virtual_nodes)
+        assignment = {}
+        for location in locations:
+            idx = bisect.bisect(points, cls._hash(location)) % len(points)
+            assignment[location] = owners[idx]
+        return assignment
+
+    @classmethod
+    def claim_shard(cls, locations: List[str]) -> List[str]:
+        """
+        Returns the subset of `locations` this replica is responsible for.
+        Falls back to every location if the replica table can't be read.
+        """
+        settings = AppConfig.get_coordination_settings()
+        ttl = settings.get("replica_ttl_seconds", 120)
+        virtual_nodes = settings.get("virtual_nodes", 64)
+
+        cls.heartbeat()
+        try:
+            with Session(engine) as session:
+                replicas = cls.live_replicas(session, ttl)
+        except Exception as e:
+            logger.error(f"Could not read live replicas, scraping all locations: {e}")
+            return list(locations)
+
+        if cls.replica_id not in replicas:
+            replicas.append(cls.replica_id)
+
+        assignment = cls.assign_locations(locations, replicas, virtual_nodes)
+        shard = [loc for loc in locations if assignment.get(loc) == cls.replica_id]
+        logger.info(f"Replica {cls.replica_id} owns {len(shard)}/{len(locations)} locations across {len(replicas)} live replicas.")
+        return shard
+
+    @classmethod
+    @contextmanager
+    def location_locks(cls, locations: List[str]):
+        """
+        Holds session-level advisory locks for `locations` on one dedicated connection.
+        Yields the locations whose lock was acquired; the rest are being scraped by another replica.
+        """
+        conn = engine.connect()
+        acquired = []
+        try:
+            for location in locations:
+                locked = conn.execute(
+                    text("SELECT pg_try_advisory_lock(:ns, hashtext(:key))"),
+                    {"ns": cls.LOCK_NAMESPACE, "key": location}
+                ).scalar()
+                if locked:
+                    acquired.append(location)
+            conn.commit()
+            yield acquired
+        finally:
+            try:
+                for location in acquired:
+                    conn.execute(text("SELECT pg_advisory_unlock(:ns, hashtext(:key))"), {"ns": cls.LOCK_NAMESPACE, "key": location})
+                conn.commit()
+            except Exception as e:
+                # Session-level locks die with the connection, so drop it rather than
+                # return it to the pool still holding them; don't mask the original error.
+                logger.error(f"Failed to release advisory locks for {len(acquired)} locations, discarding connection: {e}")
+                conn.invalidate()
+            conn.close()
@@ -0,0 +1,151 @@
+import logging
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from app.core.addresses import ADDRESS_ABBREVIATIONS
+
+logger = logging.getLogger(__name__)
+
+GEOHASH_ALPHABET = np.array(list("0123456789bcdefghjkmnpqrstuvwxyz"))
+
+class EntityResolver:
+    """
+    Merges listings that describe the same house across sources (realtor.com, Zillow) and
+    across overlapping location searches, before anything is processed or stored.
+
+    Candidates are blocked on a geohash cell of lat/lon and matched on the normalized street
+    address. A second, half-cell-shifted grid catches pairs that straddle a cell edge, and
+    exact property_url matches are merged too. Each match group collapses into one canonical
+    record, coalescing columns in source-priority order.
+    """
+    GEOHASH_PRECISION = 7  # ~150m x 150m cells
+    SOURCE_PRIORITY = {"realtor.com": 0, "realtor": 0, "zillow": 1}
+
+    @staticmethod
+    def normalize_addresses(addresses: pd.Series) -> pd.Series:
+        """
+        Lower-cases, strips punctuation, canonicalizes unit markers and abbreviates street
+        words. Vectorized over the whole Series.
+        """
+        normalized = (
+            addresses.fillna("").astype(str).str.lower()
+            .str.replace("#", " unit ", regex=False)
+            .str.replace(r"[^a-z0-9 ]", " ", regex=True)
+        )
+        pattern = r"\b(" + "|".join(sorted(ADDRESS_ABBREVIATIONS, key=len, reverse=True)) + r")\b"
+        normalized = normalized.str.replace(pattern, lambda m: ADDRESS_ABBREVIATIONS[m.group(1)], regex=True)
+        return normalized.str.replace(r"\s+", " ", regex=True).str.strip()
+
+    @staticmethod
+    def geohash(lat: np.ndarray, lon: np.ndarray, precision: int = GEOHASH_PRECISION) -> np.ndarray:
+        """
+        Vectorized geohash encoding. Returns an array of `precision`-character cell ids.
+        """
+        bits = precision * 5
+        lon_bits, lat_bits = (bits + 1) // 2, bits // 2
+        lat_idx = np.clip(np.floor((lat + 90.0) / 180.0 * (1 << lat_bits)), 0, (1 << lat_bits) - 1).astype(np.int64)
+        lon_idx = np.clip(np.floor((lon + 180.0) / 360.0 * (1 << lon_bits)), 0, (1 << lon_bits) - 1).astype(np.int64)
+
+        # Interleave bits, longitude first
+        code = np.zeros(len(lat_idx), dtype=np.int64)
+        for i in range(bits):
+            if i % 2 == 0:
+                bit = (lon_idx >> (lon_bits - 1 - i // 2)) & 1
+            else:
+                bit = (lat_idx >> (lat_bits - 1 - i // 2)) & 1
+            code = (code << 1) | bit
+
+        chars = [GEOHASH_ALPHABET[(code >> (5 * (precision - 1 - k))) & 31] for k in range(precision)]
+        cells = chars[0].astype(object)
+        for column in chars[1:]:
+            cells = cells + column.astype(object)
+        return cells
+
+    @classmethod
+    def _cell_size(cls, precision: int):
+        bits = precision * 5
+        return 180.0 / (1 << (bits // 2)), 360.0 / (1 << ((bits + 1) // 2))
+
+    @staticmethod
+    def _street_line(df: pd.DataFrame) -> pd.Series:
+        """
+        First segment of formatted_address, falling back to the street/address columns.
+        """
+        street = pd.Series("", index=df.index, dtype=object)
+        for col in ("address", "street"):
+            if col in df.columns:
+                street = street.where(street != "", df[col].fillna("").astype(str))
+        if "formatted_address" in df.columns:
+            first_segment = df["formatted_address"].fillna("").astype(str).str.split(",", n=1).str[0]
+            street = first_segment.where(first_segment != "", street)
+        if "unit" in df.columns:
+            unit = df["unit"].fillna("").astype(str)
+            has_unit = (unit != "") & ~street.str.contains(r"(?:unit|apt|#)", case=False, regex=True)
+            street = street.where(~has_unit, street + " unit " + unit)
+        return street
+
+    @staticmethod
+    def _source_rank(df: pd.DataFrame) -> pd.Series:
+        if "site_name" in df.columns:
+            source = df["site_name"].fillna("").astype(str).str.lower()
+        else:
+            source = pd.Series("", index=df.index)
+        urls = df["property_url"].fillna("").astype(str) if "property_url" in df.columns else source
+        source = source.where(source != "", np.where(urls.str.contains("zillow.com"), "zillow", np.where(urls.str.contains("realtor.com"), "realtor", "")))
+        return source.map(EntityResolver.SOURCE_PRIORITY).fillna(len(EntityResolver.SOURCE_PRIORITY)).astype(int)
+
+    @staticmethod
+    def _components(labelings: List[np.ndarray]) -> np.ndarray:
+        """
+        Connected components over rows that share a label in any of `labelings`,
+        via repeated min-label propagation.
+        """
+        component = np.arange(len(labelings[0]))
+        while True:
+            previous = component
+            for labels in labelings:
+                component = pd.Series(component).groupby(labels).transform("min").to_numpy()
+            if np.array_equal(component, previous):
+                return component
+
+    @classmethod
+    def resolve(cls, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns one row per real-world listing. The canonical row keeps the highest-priority
+        source's values (filling gaps from the others) and lists every merged URL in `alias_urls`.
+        """
+        if df.empty or "property_url" not in df.columns:
+            return df
+
+        df = df[df["property_url"].notna()].copy()
+        df["_rank"] = cls._source_rank(df)
+        df = df.sort_values(["_rank", "property_url"], kind="stable").reset_index(drop=True)
+        n = len(df)
+
+        address = cls.normalize_addresses(cls._street_line(df))
+        lat = pd.to_numeric(df.get("latitude"), errors="coerce").to_numpy(dtype=float)
+        lon = pd.to_numeric(df.get("longitude"), errors="coerce").to_numpy(dtype=float)
+        matchable = (~np.isnan(lat)) & (~np.isnan(lon)) & address.str.contains(r"\d", regex=True).to_numpy()
+
+        # Rows that can't be blocked only merge on identical URL
+        unique_labels = -np.arange(1, n + 1)
+        lat_step, lon_step = cls._cell_size(cls.GEOHASH_PRECISION)
+        safe_lat, safe_lon = np.nan_to_num(lat), np.nan_to_num(lon)
+        labelings = [pd.factorize(df["property_url"])[0]]
+        for shift in (0.0, 0.5):
+            cells = cls.geohash(safe_lat + lat_step * shift, safe_lon + lon_step * shift)
+            keys = pd.Series(cells, dtype=object) + "|" + address
+            labels = pd.factorize(keys)[0]
+            labelings.append(np.where(matchable, labels, unique_labels))
+
+        df["_entity"] = cls._components(labelings)
+        aliases = df.drop_duplicates(["_entity", "property_url"]).groupby("_entity", sort=False)["property_url"].agg(list)
+        merged = df.groupby("_entity", sort=False).first()
+        merged["alias_urls"] = aliases
+        merged = merged.reset_index(drop=True).drop(columns=["_rank"])
+
+        if len(merged) < n:
+            logger.info(f"Entity resolution merged {n} scraped rows into {len(merged)} listings.")
+        return merged
@@ -0,0 +1,94 @@
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `rate` tokens are added per second up to `capacity`;
+    `acquire` blocks until a token is available.
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+def build_session(pool_size: int = 10, headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    Returns a requests Session with a connection pool sized for `pool_size` concurrent
+    workers, so connections are kept alive and reused across requests.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+def request_with_retries(
+    session: requests.Session,
+    method: str,
+    url: str,
+    rate_limiter: Optional[TokenBucket] = None,
+    max_retries: int = 3,
+    timeout: Union[float, Tuple[float, float]] = (5, 30),
+    backoff_base: float = 0.5,
+    backoff_max: float = 10.0,
+    **kwargs
+) -> requests.Response:
+    """
+    Sends a request through `session`, waiting on `rate_limiter` before every attempt.
+    Connection errors, timeouts and retryable statuses are retried with full-jitter
+    exponential backoff (honouring Retry-After when the server sends one).
+    Raises the last error once retries are exhausted.
+    """
+    attempt = 0
+    while True:
+        if rate_limiter:
+            rate_limiter.acquire()
+
+        retry_after = None
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                return response
+            error = requests.HTTPError(f"{response.status_code} from {url}", response=response)
+            retry_after = response.headers.get("Retry-After")
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+
+        if attempt >= max_retries:
+            raise error
+
+        delay = random.uniform(0, min(backoff_max, backoff_base * (2 ** attempt)))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(backoff_max, float(retry_after)))
+        attempt += 1
+        logger.warning(f"{method} {url} failed ({error}); retry {attempt}/{max_retries} in {delay:.2f}s")
+        time.sleep(delay)
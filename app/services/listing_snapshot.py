@@ -0,0 +1,266 @@
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlmodel import text
+
+from app.core.config import AppConfig
+from app.core.database import engine
+from app.services.storage import DELISTED_STATUS
+
+logger = logging.getLogger(__name__)
+
+# Fixed tier order, so tier codes double as a rank (gold best); -1 means no tier
+TIERS = ("gold", "silver", "bronze")
+
+# Fields of each /properties item
+RECORD_COLUMNS = [
+    "id", "address", "price", "beds", "baths", "sqft", "status", "property_url",
+    "gis_tier", "gis_contour", "lat", "lon", "primary_image_url", "created_at", "latest_change"
+]
+
+INTEGER_COLUMNS = ("beds", "sqft", "gis_contour")
+
+# Sortable snapshot columns, by the name /properties accepts
+SORT_COLUMNS = ("price", "beds", "baths", "sqft", "created_at", "gis_contour", "latest_change")
+
+SNAPSHOT_SQL = """
+    SELECT
+        pl.id, pl.address, pl.price, pl.beds, pl.baths, pl.sqft, pl.status, pl.property_url,
+        pl.gis_tier, pl.gis_contour, ST_X(pl.location) AS lon, ST_Y(pl.location) AS lat,
+        pl.primary_image_url, pl.created_at, pl.county, pl.search_location, pl.price_tier,
+        lc.latest_change
+    FROM property_listings pl
+    LEFT JOIN (
+        SELECT property_id, max("timestamp") AS latest_change
+        FROM property_change_log
+        GROUP BY property_id
+    ) lc ON lc.property_id = pl.id
+    WHERE pl.location IS NOT NULL
+"""
+
+# Cumulative row-change counters; any write to listings, their change log or per-user
+# tiers moves them
+SIGNATURE_SQL = """
+    SELECT COALESCE(sum(n_tup_ins + n_tup_upd + n_tup_del), 0)
+    FROM pg_stat_all_tables
+    WHERE relname IN ('property_listings', 'user_listing_tiers') OR relname LIKE 'property\\_change\\_log%'
+"""
+
+class ListingSnapshot:
+    """
+    Immutable, columnar copy of the hot listings the map and filters need.
+
+    Numeric fields are NumPy arrays (NaN for missing), status and tiers are interned as
+    integer codes, and `records` holds the prebuilt response dicts. A new snapshot is built
+    after each scrape and swapped in with a single reference assignment, so readers never
+    see a half-built snapshot. Readers also notice when the tables' change counters move
+    (at most once per `snapshot.staleness_seconds`); that rebuild runs on a background
+    thread while they keep being served the previous snapshot. Only the first read, before
+    any snapshot exists, waits for a build.
+    """
+    _current: Optional["ListingSnapshot"] = None
+    _build_lock = threading.Lock()
+    _checked_at = 0.0
+    _versions = itertools.count(1)
+
+    def __init__(self, frame: pd.DataFrame, signature: Optional[int] = None):
+        self.version = next(self._versions)
+        self.signature = signature
+        self.built_at = time.time()
+        self.size = len(frame)
+
+        self.ids = frame["id"].astype(str).to_numpy(dtype=object)
+        self.index = {listing_id: i for i, listing_id in enumerate(self.ids)}
+
+        self.price = pd.to_numeric(frame["price"], errors="coerce").to_numpy(dtype=float)
+        self.beds = pd.to_numeric(frame["beds"], errors="coerce").to_numpy(dtype=float)
+        self.baths = pd.to_numeric(frame["baths"], errors="coerce").to_numpy(dtype=float)
+        self.sqft = pd.to_numeric(frame["sqft"], errors="coerce").to_numpy(dtype=float)
+        self.gis_contour = pd.to_numeric(frame["gis_contour"], errors="coerce").to_numpy(dtype=float)
+        self.lat = frame["lat"].to_numpy(dtype=float)
+        self.lon = frame["lon"].to_numpy(dtype=float)
+        self.created_at = self._epoch_seconds(frame["created_at"])
+        self.latest_change = self._epoch_seconds(frame["latest_change"])
+
+        self.status_codes, self.status_values = self._intern(frame["status"])
+        self.county_codes, self.county_values = self._intern(frame["county"])
+        self.location_codes, self.location_values = self._intern(frame["search_location"])
+        self.gis_tier_codes = self.tier_codes(frame["gis_tier"])
+        self.price_tier_codes = self.tier_codes(frame["price_tier"])
+        self.delisted = self.status_codes == self.status_code(DELISTED_STATUS)
+
+        columns = {}
+        for column in RECORD_COLUMNS:
+            values = frame[column].astype(object).to_numpy()
+            missing = pd.isna(values)
+            if column in INTEGER_COLUMNS:
+                values = np.array([None if m else int(v) for v, m in zip(values, missing)], dtype=object)
+            else:
+                values[missing] = None
+            columns[column] = values
+        columns["id"] = self.ids
+        self.records: List[Dict[str, Any]] = [dict(zip(RECORD_COLUMNS, row)) for row in zip(*(columns[c] for c in RECORD_COLUMNS))]
+
+    @staticmethod
+    def _epoch_seconds(column: pd.Series) -> np.ndarray:
+        values = pd.to_datetime(column, errors="coerce", utc=True)
+        seconds = values.astype("int64").to_numpy(dtype=float) / 1e9
+        seconds[values.isna().to_numpy()] = np.nan
+        return seconds
+
+    @staticmethod
+    def _intern(column: pd.Series) -> Tuple[np.ndarray, List[str]]:
+        codes, uniques = pd.factorize(column)
+        return codes.astype(np.int32), list(uniques)
+
+    @staticmethod
+    def tier_codes(values) -> np.ndarray:
+        return pd.Series(values, dtype=object).map({tier: i for i, tier in enumerate(TIERS)}).fillna(-1).to_numpy(dtype=np.int8)
+
+    def status_code(self, status: str) -> int:
+        return self.status_values.index(status) if status in self.status_values else -2
+
+    def codes_for(self, values: List[str], requested: Sequence[str]) -> List[int]:
+        lookup = {str(v).lower(): i for i, v in enumerate(values)}
+        return [lookup[r.lower()] for r in requested if r.lower() in lookup]
+
+    @staticmethod
+    def _signature(conn) -> Optional[int]:
+        try:
+            return int(conn.execute(text(SIGNATURE_SQL)).scalar())
+        except Exception as e:
+            logger.warning(f"Could not read listing change counters: {e}")
+            return None
+
+    @classmethod
+    def refresh(cls, force: bool = True) -> "ListingSnapshot":
+        """
+        Builds a new snapshot from the database and swaps it in, one build at a time.
+        Without `force` the build is skipped if another thread swapped in a snapshot while
+        this one waited, or if the change counters still match the live snapshot.
+        """
+        seen = cls._current
+        with cls._build_lock:
+            current = cls._current
+            if not force and current is not None and current is not seen:
+                return current
+
+            started = time.perf_counter()
+            with engine.connect() as conn:
+                signature = cls._signature(conn)
+                if not force and current is not None and signature is not None and signature == current.signature:
+                    cls._checked_at = time.monotonic()
+                    return current
+                frame = pd.read_sql(text(SNAPSHOT_SQL), conn)
+            snapshot = cls(frame, signature)
+            cls._current = snapshot
+            cls._checked_at = time.monotonic()
+        logger.info(f"Listing snapshot v{snapshot.version} built with {snapshot.size} listings in {time.perf_counter() - started:.2f}s.")
+        return snapshot
+
+    @classmethod
+    def _refresh_stale(cls):
+        try:
+            cls.refresh(force=False)
+        except Exception as e:
+            logger.error(f"Background listing snapshot rebuild failed: {e}")
+
+    @classmethod
+    def current(cls) -> "ListingSnapshot":
+        """
+        Returns the live snapshot. Builds one first only if there is none yet; otherwise,
+        at most once per staleness interval, starts a background check-and-rebuild and
+        returns the current snapshot without waiting for it.
+        """
+        snapshot = cls._current
+        if snapshot is None:
+            return cls.refresh(force=False)
+
+        staleness = AppConfig.get_snapshot_settings().get("staleness_seconds", 30)
+        if time.monotonic() - cls._checked_at >= staleness:
+            cls._checked_at = time.monotonic()
+            threading.Thread(target=cls._refresh_stale, name="listing-snapshot-refresh", daemon=True).start()
+        return snapshot
+
+    def user_tiers(self, tiers: Dict[str, Tuple[str, int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Tier codes and contours with a user's materialized tiers in place of the global ones.
+        Listings without a user row have no tier.
+        """
+        tier_codes = np.full(self.size, -1, dtype=np.int8)
+        contours = np.full(self.size, np.nan)
+        rows = [(self.index[pid], tier, contour) for pid, (tier, contour) in tiers.items() if pid in self.index]
+        if rows:
+            positions = np.array([r[0] for r in rows])
+            tier_codes[positions] = self.tier_codes([r[1] for r in rows])
+            contours[positions] = np.array([r[2] for r in rows], dtype=float)
+        return tier_codes, contours
+
+    def filter(
+        self,
+        include_delisted: bool = False,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_beds: Optional[float] = None,
+        min_baths: Optional[float] = None,
+        min_sqft: Optional[float] = None,
+        tiers: Optional[List[str]] = None,
+        statuses: Optional[List[str]] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        tier_codes: Optional[np.ndarray] = None,
+        locations: Optional[List[str]] = None,
+    ) -> np.ndarray:
+        """
+        Vectorized filter; returns a boolean mask over the snapshot rows.
+        `bbox` is (west, south, east, north). `tier_codes` overrides the global tiers.
+        `locations` keeps listings whose search_location is one of them.
+        """
+        mask = np.ones(self.size, dtype=bool)
+        if not include_delisted:
+            mask &= ~self.delisted
+        # NaN comparisons are False, so listings missing the field drop out of range filters
+        if min_price is not None:
+            mask &= self.price >= min_price
+        if max_price is not None:
+            mask &= self.price <= max_price
+        if min_beds is not None:
+            mask &= self.beds >= min_beds
+        if min_baths is not None:
+            mask &= self.baths >= min_baths
+        if min_sqft is not None:
+            mask &= self.sqft >= min_sqft
+        if tiers:
+            codes = self.tier_codes([t.lower() for t in tiers])
+            mask &= np.isin(self.gis_tier_codes if tier_codes is None else tier_codes, codes[codes >= 0])
+        if statuses:
+            mask &= np.isin(self.status_codes, self.codes_for(self.status_values, statuses))
+        if locations is not None:
+            mask &= np.isin(self.location_codes, self.codes_for(self.location_values, locations))
+        if bbox is not None:
+            west, south, east, north = bbox
+            mask &= (self.lat >= south) & (self.lat <= north) & (self.lon >= west) & (self.lon <= east)
+        return mask
+
+    def order(self, mask: np.ndarray, sort: Optional[str] = None, contours: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Row indices selected by `mask`, sorted by `sort` ("price", "-created_at", ...).
+        Missing values always sort last.
+        """
+        rows = np.flatnonzero(mask)
+        if not sort:
+            return rows
+
+        descending = sort.startswith("-")
+        name = sort.lstrip("-")
+        if name not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort field '{name}'")
+        values = contours if name == "gis_contour" and contours is not None else getattr(self, name)
+        keys = values[rows]
+        keys = np.where(np.isnan(keys), np.inf if not descending else -np.inf, keys)
+        ordering = np.argsort(-keys if descending else keys, kind="stable")
+        return rows[ordering]
@@ -1,6 +1,8 @@
 import pandas as pd
 from typing import Optional, Dict, Any
 
+from app.core.config import AppConfig
+
 class PropertyProcessor:
     @staticmethod
     def get_safe(val: Any, cast_type=None) -> Any:
@@ -16,17 +18,39 @@ class PropertyProcessor:
             return None
 
     @staticmethod
-    def calculate_price_tier(price: float) -> Optional[str]:
+    def calculate_price_tier(price: float, thresholds: Optional[Dict[str, float]] = None) -> Optional[str]:
+        """
+        Maps a price to gold/silver/bronze using `thresholds` (upper bounds per tier),
+        defaulting to `pricing.tiers` in config.yaml.
+        """
         if price is None:
             return None
-        if price <= 220000:
+        thresholds = thresholds or AppConfig.get_price_tiers()
+        if price <= thresholds.get('gold', 220000):
             return 'gold'
-        elif price <= 250000:
+        elif price <= thresholds.get('silver', 250000):
             return 'silver'
-        elif price <= 275000:
+        elif price <= thresholds.get('bronze', 275000):
             return 'bronze'
         return None
 
+    @classmethod
+    def get_county(cls, prop: pd.Series) -> Optional[str]:
+        """
+        County as reported by the source, falling back to the search location
+        (our locations are counties/cities, e.g. "Albemarle County, VA" -> "Albemarle").
+        """
+        county = cls.get_safe(prop.get('county'), str)
+        if not county:
+            location = cls.get_safe(prop.get('search_location'), str)
+            if not location:
+                return None
+            county = location.split(',')[0]
+        for suffix in (' County', ' county'):
+            if county.endswith(suffix):
+                county = county[:-len(suffix)]
+        return county.strip() or None
+
     @classmethod
     def process_listing(cls, prop: pd.Series) -> Dict[str, Any]:
         """
@@ -57,8 +81,12 @@ class PropertyProcessor:
             'year_built': cls.get_safe(prop.get('year_built'), int),
             'status': str(prop.get('status', 'unknown')),
             'mls': str(prop.get('mls')) if not pd.isna(prop.get('mls')) else None,
+            'mls_id': cls.get_safe(prop.get('mls_id'), str),
+            'county': cls.get_county(prop),
+            'search_location': cls.get_safe(prop.get('search_location'), str),
             'address': prop.get('formatted_address', f"{prop.get('street', '')}, {prop.get('city', '')}, {prop.get('state', '')}"),
             'price_tier': cls.calculate_price_tier(price),
             'primary_image_url': cls.get_safe(prop.get('primary_photo'), str),
-            'alt_images': cls.get_safe(prop.get('alt_photos')) # Expecting list or None, let Storage handle or just save
+            'alt_images': cls.get_safe(prop.get('alt_photos')), # Expecting list or None, let Storage handle or just save
+            'alias_urls': cls.get_safe(prop.get('alias_urls')) # Other URLs entity resolution merged into this one
         }
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import AppConfig
+from app.services.listing_snapshot import ListingSnapshot, TIERS
+
+logger = logging.getLogger(__name__)
+
+# Score components, by the key used in `ranking.weights` and UserSettings.ranking_weights
+COMPONENTS = ("price_tier", "contour", "beds", "baths", "sqft", "recency")
+
+# Contour score of a listing in the outermost zone; the same step as one price tier band
+IN_ZONE_FLOOR = 1 / 3
+
+class RankingEngine:
+    """
+    Scores every listing in the snapshot for one user in a single vectorized pass and
+    returns the top K.
+
+    Each component is scaled to [0, 1] and missing values score 0:
+    - price_tier: gold 1, silver 2/3, bronze 1/3, from the user's `price_tiers` thresholds
+    - contour: 1/3 for any listing inside a zone, plus the rest scaled by drive-time
+      headroom under the largest zone contour; listings outside every zone score 0
+    - beds, baths, sqft: min-max normalized over the candidate listings
+    - recency: exponential decay on the newest of created_at / latest change
+    The score is the weighted mean of the components. Rankings are cached per
+    (user, settings hash, snapshot version, k) in a bounded LRU.
+    """
+    _cache: "OrderedDict[Tuple, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    @staticmethod
+    def weights(user_weights: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+        weights = dict(AppConfig.get_ranking_settings().get("weights", {}))
+        weights.update(user_weights or {})
+        return {name: float(weights.get(name, 0) or 0) for name in COMPONENTS}
+
+    @staticmethod
+    def settings_hash(*settings: Any) -> str:
+        key = json.dumps(list(settings), sort_keys=True, default=str)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def price_tier_scores(price: np.ndarray, thresholds: Dict[str, Any]) -> np.ndarray:
+        """
+        Vectorized PropertyProcessor.calculate_price_tier, as a score instead of a label.
+        """
+        bounds = [float(thresholds.get(tier, default)) for tier, default in zip(TIERS, (220000, 250000, 275000))]
+        conditions = [price <= bound for bound in bounds]
+        scores = [(len(TIERS) - i) / len(TIERS) for i in range(len(TIERS))]
+        return np.select(conditions, scores, default=0.0)
+
+    @staticmethod
+    def _normalized(values: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """
+        Min-max scales `values` over `rows`, with NaN mapped to 0.
+        """
+        scores = np.zeros(len(values))
+        candidates = values[rows]
+        if not np.isfinite(candidates).any():
+            return scores
+        low, high = np.nanmin(candidates), np.nanmax(candidates)
+        if high > low:
+            scores = (values - low) / (high - low)
+        else:
+            scores = np.where(np.isnan(values), 0.0, 1.0)
+        return np.nan_to_num(np.clip(scores, 0.0, 1.0))
+
+    @staticmethod
+    def max_contour(isochrone_settings: Optional[Dict[str, Any]] = None) -> float:
+        """
+        Largest zone contour in minutes: the user's isochrone contours/tiers if set,
+        otherwise `zones.tiers` from config.yaml.
+        """
+        settings = isochrone_settings or {}
+        contours = settings.get("contours") or list((settings.get("tiers") or {}).values())
+        contours = contours or list(AppConfig.get_zone_tiers().values())
+        return float(max(contours)) if contours else 0.0
+
+    @staticmethod
+    def contour_scores(contours: np.ndarray, limit: float) -> np.ndarray:
+        """
+        In-zone listings (any contour) score at least IN_ZONE_FLOOR, so the outermost zone
+        still beats no zone; the remainder rewards headroom under `limit`.
+        """
+        in_zone = ~np.isnan(contours)
+        headroom = np.clip(1.0 - contours / limit, 0.0, 1.0) if limit > 0 else np.zeros(len(contours))
+        scores = IN_ZONE_FLOOR + (1.0 - IN_ZONE_FLOOR) * np.nan_to_num(headroom)
+        return np.where(in_zone, scores, 0.0)
+
+    @classmethod
+    def score(
+        cls,
+        snapshot: ListingSnapshot,
+        rows: np.ndarray,
+        contours: Optional[np.ndarray] = None,
+        price_tiers: Optional[Dict[str, Any]] = None,
+        isochrone_settings: Optional[Dict[str, Any]] = None,
+        ranking_weights: Optional[Dict[str, Any]] = None,
+        now: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Weighted score for every snapshot row; `rows` are the candidates used for
+        normalization. `contours` overrides the global gis_contour (per-user zones).
+        """
+        weights = cls.weights(ranking_weights)
+        total = sum(weights.values())
+        if total <= 0:
+            return np.zeros(snapshot.size)
+
+        settings = AppConfig.get_ranking_settings()
+        components = {}
+        components["price_tier"] = cls.price_tier_scores(snapshot.price, price_tiers or AppConfig.get_price_tiers())
+
+        components["contour"] = cls.contour_scores(snapshot.gis_contour if contours is None else contours, cls.max_contour(isochrone_settings))
+
+        components["beds"] = cls._normalized(snapshot.beds, rows)
+        components["baths"] = cls._normalized(snapshot.baths, rows)
+        components["sqft"] = cls._normalized(snapshot.sqft, rows)
+
+        half_life = float(settings.get("recency_half_life_days", 14)) * 86400
+        activity = np.fmax(snapshot.created_at, snapshot.latest_change)
+        age = np.maximum((now if now is not None else snapshot.built_at) - activity, 0.0)
+        components["recency"] = np.nan_to_num(np.exp2(-age / half_life))
+
+        score = np.zeros(snapshot.size)
+        for name, weight in weights.items():
+            if weight:
+                score += weight * components[name]
+        return score / total
+
+    @staticmethod
+    def top_k(scores: np.ndarray, rows: np.ndarray, k: int) -> np.ndarray:
+        """
+        Indices of the `k` best-scoring `rows`, best first. argpartition keeps this O(n).
+        """
+        if k <= 0 or len(rows) == 0:
+            return rows[:0]
+        candidates = scores[rows]
+        if k < len(rows):
+            best = np.argpartition(-candidates, k - 1)[:k]
+        else:
+            best = np.arange(len(rows))
+        ordering = np.argsort(-candidates[best], kind="stable")
+        return rows[best[ordering]]
+
+    @classmethod
+    def _cache_get(cls, key: Tuple) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        with cls._cache_lock:
+            cached = cls._cache.get(key)
+            if cached is not None:
+                cls._cache.move_to_end(key)
+            return cached
+
+    @classmethod
+    def _cache_put(cls, key: Tuple, value: Tuple[np.ndarray, np.ndarray]):
+        size = AppConfig.get_ranking_settings().get("cache_size", 256)
+        with cls._cache_lock:
+            cls._cache[key] = value
+            cls._cache.move_to_end(key)
+            while len(cls._cache) > size:
+                cls._cache.popitem(last=False)
+
+    @classmethod
+    def rank(
+        cls,
+        snapshot: ListingSnapshot,
+        user_id: Any,
+        k: int,
+        contours: Optional[np.ndarray] = None,
+        price_tiers: Optional[Dict[str, Any]] = None,
+        isochrone_settings: Optional[Dict[str, Any]] = None,
+        ranking_weights: Optional[Dict[str, Any]] = None,
+        scope: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (row indices, scores) of the user's top `k` active listings, limited to
+        their scrape `scope` (locations and price ceiling) when given.
+        """
+        key = (str(user_id), cls.settings_hash(price_tiers, isochrone_settings, ranking_weights, scope), snapshot.version, k)
+        cached = cls._cache_get(key)
+        if cached is not None:
+            return cached
+
+        scope = scope or {}
+        rows = np.flatnonzero(snapshot.filter(max_price=scope.get("price_max"), locations=scope.get("locations")))
+        scores = cls.score(snapshot, rows, contours, price_tiers, isochrone_settings, ranking_weights)
+        best = cls.top_k(scores, rows, k)
+        result = (best, scores[best])
+        cls._cache_put(key, result)
+        return result
+
+    @staticmethod
+    def records(snapshot: ListingSnapshot, rows: np.ndarray, scores: np.ndarray, tier_codes: Optional[np.ndarray] = None, contours: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        results = []
+        for i, score in zip(rows, scores):
+            record = dict(snapshot.records[i])
+            if tier_codes is not None:
+                record["gis_tier"] = TIERS[tier_codes[i]] if tier_codes[i] >= 0 else None
+                record["gis_contour"] = int(contours[i]) if not np.isnan(contours[i]) else None
+            record["score"] = round(float(score), 4)
+            results.append(record)
+        return results
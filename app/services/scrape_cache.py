@@ -0,0 +1,172 @@
+import glob
+import logging
+import os
+import re
+import time
+from datetime import date
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app.core.config import AppConfig
+
+logger = logging.getLogger(__name__)
+
+class ScrapeCache:
+    """
+    On-disk Parquet cache of raw scrape DataFrames.
+
+    Entries are keyed by (source, location, listing_type, price_max, past_days, date) and laid
+    out as `<directory>/<source>/<location>/<listing_types>_<price_max>max_<past_days>d_<date>.parquet`,
+    so the newest entry for a key is simply the last file in sorted order. Full-inventory
+    scrapes (past_days=None) use `all` in place of `<past_days>d`.
+
+    Live scrapes always write through but only read back when `reuse_live` is set, so a
+    scheduled run never misses price changes or delistings; replay reads via `latest`.
+    """
+
+    @staticmethod
+    def _settings():
+        return AppConfig.get_scrape_cache_settings()
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return bool(cls._settings().get("enabled", False))
+
+    @classmethod
+    def _root(cls) -> str:
+        directory = cls._settings().get("directory", ".cache/scrapes")
+        if os.path.isabs(directory):
+            return directory
+        return os.path.join(AppConfig.get_base_dir(), directory)
+
+    @staticmethod
+    def _slug(value: str) -> str:
+        return re.sub(r"[^a-z0-9]+", "-", str(value).lower()).strip("-")
+
+    @classmethod
+    def _prefix(cls, source: str, location: str, listing_type: List[str], past_days: Optional[int], price_max: Optional[int] = None) -> str:
+        types = "+".join(sorted(cls._slug(t) for t in listing_type))
+        price = f"{int(price_max)}max_" if price_max else ""
+        # past_days=None is a full-inventory scrape
+        days = f"{past_days}d" if past_days is not None else "all"
+        return os.path.join(cls._root(), cls._slug(source), cls._slug(location), f"{types}_{price}{days}_")
+
+    @classmethod
+    def path_for(cls, source: str, location: str, listing_type: List[str], past_days: Optional[int], day: Optional[date] = None, price_max: Optional[int] = None) -> str:
+        day = day or date.today()
+        return f"{cls._prefix(source, location, listing_type, past_days, price_max)}{day.isoformat()}.parquet"
+
+    @classmethod
+    def get(cls, source: str, location: str, listing_type: List[str], past_days: Optional[int], day: Optional[date] = None, price_max: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        Returns today's cached frame for the key if it is younger than the TTL, else None.
+        Always None unless `reuse_live` is enabled.
+        """
+        if not cls.is_enabled() or not cls._settings().get("reuse_live", False):
+            return None
+
+        path = cls.path_for(source, location, listing_type, past_days, day, price_max)
+        if not os.path.exists(path):
+            return None
+
+        ttl_seconds = cls._settings().get("ttl_hours", 12) * 3600
+        if time.time() - os.path.getmtime(path) > ttl_seconds:
+            return None
+
+        return cls._read(path)
+
+    @classmethod
+    def latest(cls, source: str, location: str, listing_type: List[str], past_days: Optional[int], day: Optional[date] = None, price_max: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        Returns the newest cached frame for the key regardless of TTL (used by replay).
+        If `day` is given, only entries on or before that date are considered.
+        """
+        prefix = cls._prefix(source, location, listing_type, past_days, price_max)
+        paths = sorted(glob.glob(f"{glob.escape(prefix)}*.parquet"))
+        if day:
+            paths = [p for p in paths if p <= f"{prefix}{day.isoformat()}.parquet"]
+        if not paths:
+            return None
+        return cls._read(paths[-1])
+
+    @classmethod
+    def put(cls, source: str, location: str, listing_type: List[str], past_days: Optional[int], df: pd.DataFrame, day: Optional[date] = None, price_max: Optional[int] = None):
+        if not cls.is_enabled() or df is None or df.empty:
+            return
+
+        path = cls.path_for(source, location, listing_type, past_days, day, price_max)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            cls._arrow_safe(df).to_parquet(tmp_path, compression="zstd", index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Failed to cache scrape for {location} ({source}): {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        cls.evict()
+
+    @classmethod
+    def evict(cls):
+        """
+        Deletes least recently written entries until the cache fits in `max_size_mb`.
+        """
+        max_bytes = cls._settings().get("max_size_mb", 512) * 1024 * 1024
+        entries = []
+        for path in glob.glob(os.path.join(glob.escape(cls._root()), "**", "*.parquet"), recursive=True):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total <= max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            logger.info(f"Evicted cached scrape {path}")
+            if total <= max_bytes:
+                break
+
+    @staticmethod
+    def _read(path: str) -> Optional[pd.DataFrame]:
+        try:
+            df = pd.read_parquet(path)
+        except Exception as e:
+            logger.error(f"Failed to read cached scrape {path}: {e}")
+            return None
+
+        # Arrow hands list columns back as numpy arrays; the processor expects plain lists
+        for col in df.columns[df.dtypes == object]:
+            if df[col].map(lambda v: isinstance(v, np.ndarray)).any():
+                df[col] = df[col].map(lambda v: v.tolist() if isinstance(v, np.ndarray) else v)
+        return df
+
+    @staticmethod
+    def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Scraped frames carry loosely typed object columns (mixed str/float, dicts).
+        Coerce any column Arrow can't infer to strings, keeping lists (e.g. alt_photos) intact.
+        """
+        df = df.copy()
+        for col in df.columns[df.dtypes == object]:
+            try:
+                pa.array(df[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                df[col] = df[col].map(lambda v: v if isinstance(v, list) or v is None or (isinstance(v, float) and pd.isna(v)) else str(v))
+                try:
+                    pa.array(df[col], from_pandas=True)
+                except Exception:
+                    df[col] = df[col].map(lambda v: None if v is None or (isinstance(v, float) and pd.isna(v)) else str(v))
+        return df
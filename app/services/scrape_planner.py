@@ -0,0 +1,96 @@
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from sqlmodel import Session, select
+
+from app.core.config import AppConfig
+from app.core.database import engine
+from app.core.models import UserSettings
+
+logger = logging.getLogger(__name__)
+
+class ScrapeTask(NamedTuple):
+    location: str
+    listing_types: Tuple[str, ...]
+    price_max: int
+    # Users whose settings asked for this location; empty when only config.yaml did
+    user_ids: Tuple[UUID, ...] = ()
+
+class ScrapePlanner:
+    """
+    Builds one scrape run's work from config.yaml and every user's settings.
+
+    Each location is fetched once per run, for the union of the listing types and up to
+    the highest `max_scrape_price` of the users that want it. Per-user views are filtered
+    from the shared results (`user_scope`), so adding users adds no network calls.
+    """
+
+    @staticmethod
+    def default_price_max() -> int:
+        return int(AppConfig.get_scraper_settings().get("max_price", 275000))
+
+    @staticmethod
+    def default_listing_types() -> List[str]:
+        return AppConfig.get_scraper_settings().get("listing_types", ["for_sale"])
+
+    @classmethod
+    def user_scope(cls, settings: Optional[UserSettings]) -> Dict[str, Any]:
+        """
+        Locations, listing types and price ceiling one user's results are drawn from.
+        Unset fields fall back to config.yaml.
+        """
+        if settings is None:
+            return {"locations": AppConfig.get_locations(), "listing_types": cls.default_listing_types(), "price_max": cls.default_price_max()}
+        return {
+            "locations": settings.scrape_locations or AppConfig.get_locations(),
+            "listing_types": settings.listing_types or cls.default_listing_types(),
+            "price_max": settings.max_scrape_price or cls.default_price_max(),
+        }
+
+    @classmethod
+    def merge(cls, scopes: List[Tuple[Optional[UUID], Dict[str, Any]]]) -> List[ScrapeTask]:
+        """
+        Collapses (user_id, scope) pairs into one task per location. A None user_id is the
+        global config. Locations keep first-seen order and are matched case-insensitively.
+        """
+        merged: Dict[str, Dict[str, Any]] = {}
+        for user_id, scope in scopes:
+            for location in scope["locations"]:
+                key = location.strip().lower()
+                task = merged.setdefault(key, {"location": location.strip(), "listing_types": [], "price_max": 0, "user_ids": []})
+                task["listing_types"].extend(t for t in scope["listing_types"] if t not in task["listing_types"])
+                task["price_max"] = max(task["price_max"], int(scope["price_max"]))
+                if user_id is not None and user_id not in task["user_ids"]:
+                    task["user_ids"].append(user_id)
+
+        return [
+            ScrapeTask(t["location"], tuple(sorted(t["listing_types"])), t["price_max"], tuple(t["user_ids"]))
+            for t in merged.values()
+        ]
+
+    @classmethod
+    def plan(cls, session: Optional[Session] = None) -> List[ScrapeTask]:
+        """
+        The deduplicated scrape plan for every configured location and user.
+        Falls back to config.yaml alone if user settings can't be read.
+        """
+        scopes = [(None, cls.user_scope(None))]
+        try:
+            if session is None:
+                with Session(engine) as own_session:
+                    user_settings = own_session.exec(select(UserSettings)).all()
+            else:
+                user_settings = session.exec(select(UserSettings)).all()
+            scopes.extend((s.user_id, cls.user_scope(s)) for s in user_settings)
+        except Exception as e:
+            logger.error(f"Could not read user scrape settings, planning from config only: {e}")
+
+        tasks = cls.merge(scopes)
+        logger.info(f"Scrape plan: {len(tasks)} locations for {len(scopes) - 1} users.")
+        return tasks
+
+    @classmethod
+    def scope_for_user(cls, session: Session, user_id: UUID) -> Dict[str, Any]:
+        settings = session.exec(select(UserSettings).where(UserSettings.user_id == user_id)).first()
+        return cls.user_scope(settings)
@@ -1,114 +1,275 @@
 import logging
-from typing import List
+from typing import List, Optional, Tuple
 import pandas as pd
 from homeharvest import scrape_property
 from sqlmodel import Session
 import time
 import random
 
+from app.core.config import AppConfig
 from app.core.database import engine
 from app.services.zillow_scraper import ZillowScraper
+from app.services.zillow_region_resolver import ZillowRegionResolver
 from app.services.property_processor import PropertyProcessor
 from app.services.gis import GISService
 from app.services.storage import PropertyStorage
+from app.services.coordination import ReplicaCoordinator
+from app.services.scrape_cache import ScrapeCache
+from app.services.archive import ArchiveService
+from app.services.entity_resolution import EntityResolver
+from app.services.zones import ZoneService
+from app.services.analytics import AnalyticsService
+from app.services.listing_snapshot import ListingSnapshot
+from app.services.scrape_planner import ScrapePlanner, ScrapeTask
 
 # Setup logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def scrape_and_store_properties(locations: list[str], listing_type: list[str] = ["for_sale", "pending"], past_days: int = 1):
+TARGET_PROPERTY_TYPES = ['single_family', 'multi_family', 'condos', 'townhomes', 'mobile', 'condo_townhome']
+
+def _fetch_cached(source: str, fetch, location: str, listing_type: list[str], past_days: Optional[int], price_max: int, replay: bool = False) -> pd.DataFrame:
+    """
+    Fetches raw results for one source, going through the on-disk scrape cache.
+    In replay mode only the cache is consulted and no network call is made.
+    Partial results (`df.attrs["complete"]` False) are returned but never cached.
+    """
+    if replay:
+        cached = ScrapeCache.latest(source, location, listing_type, past_days, price_max=price_max)
+        if cached is None:
+            logger.warning(f"Replay: no cached {source} scrape for {location}.")
+            return pd.DataFrame()
+        return cached
+
+    cached = ScrapeCache.get(source, location, listing_type, past_days, price_max=price_max)
+    if cached is not None:
+        logger.info(f"Using cached {source} scrape for {location} ({len(cached)} rows).")
+        return cached
+
+    df = fetch()
+    if df.attrs.get("complete", True):
+        ScrapeCache.put(source, location, listing_type, past_days, df, price_max=price_max)
+    return df
+
+def _fetch_homeharvest(location: str, listing_type: list[str], past_days: Optional[int], price_max: int, replay: bool = False) -> pd.DataFrame:
+    return _fetch_cached("homeharvest", lambda: scrape_property(
+        location=location,
+        listing_type=listing_type,
+        past_days=past_days,
+        price_max=price_max,
+        property_type=TARGET_PROPERTY_TYPES
+    ), location, listing_type, past_days, price_max, replay)
+
+def _fetch_zillow(location: str, listing_type: list[str], past_days: Optional[int], price_max: int, replay: bool = False) -> pd.DataFrame:
+    return _fetch_cached("zillow", lambda: ZillowScraper.scrape(location, price_max), location, listing_type, past_days, price_max, replay)
+
+def _fetch_location(location: str, listing_type: list[str], past_days: Optional[int], price_max: int, replay: bool = False) -> Tuple[pd.DataFrame, bool]:
+    """
+    Fetches the raw frames for a single location from every enabled source, up to `price_max`.
+    Rows are tagged with the `search_location` that produced them.
+    Returns (frame, complete); `complete` is False if any enabled source failed or was
+    truncated, in which case the result can't be used to detect delisted listings.
+    """
+    logger.info(f"Scraping location: {location} ({', '.join(listing_type)} up to ${price_max:,})")
+    dfs = []
+    complete = True
+
+    # 1. HomeHarvest Scrape
+    try:
+        hh_df = _fetch_homeharvest(location, listing_type, past_days, price_max, replay)
+        if not hh_df.empty:
+            dfs.append(hh_df)
+    except Exception as e:
+        complete = False
+        logger.error(f"HomeHarvest scrape failed for {location}: {e}")
+
+    # 2. Zillow Direct Scrape
+    if AppConfig.get_zillow_settings().get("enabled", False):
+        try:
+            z_df = _fetch_zillow(location, listing_type, past_days, price_max, replay)
+            complete = complete and z_df.attrs.get("complete", True)
+            if not z_df.empty:
+                dfs.append(z_df)
+        except Exception as e:
+            complete = False
+            logger.error(f"Zillow direct scrape failed for {location}: {e}")
+
+    if not dfs:
+        logger.info(f"No properties found for {location} from any source.")
+        return pd.DataFrame(), complete
+
+    properties = pd.concat(dfs, ignore_index=True)
+    properties['search_location'] = location
+
+    # Log source distribution
+    if 'site_name' in properties.columns:
+         logger.info(f"Sources for {location}: {properties['site_name'].unique()}")
+    elif 'property_url' in properties.columns:
+         sites = properties['property_url'].apply(lambda x: 'zillow' if 'zillow.com' in str(x) else ('realtor' if 'realtor.com' in str(x) else 'other')).unique()
+         logger.info(f"inferred Sources for {location}: {sites}")
+
+    return properties, complete
+
+def _store_location(location: str, properties: pd.DataFrame, listing_type: list[str], sweep: bool = True, price_max: Optional[int] = None):
+    """
+    Processes, GIS-tags and upserts one location's resolved listings, then sweeps the
+    location's listings (up to `price_max`) that weren't seen within the grace window
+    to 'delisted'. Returns (new, updated) counts.
+    """
+    count_loc_new = 0
+    count_loc_updated = 0
+    new_external_ids = []
+
+    with Session(engine) as session:
+        # Back on the market: bring archived rows (and their history) back under their
+        # ids in one statement, so the upserts below update them instead of inserting
+        aliases = properties['alias_urls'] if 'alias_urls' in properties.columns else [None] * len(properties)
+        groups = []
+        for url, alias_urls in zip(properties['property_url'], aliases):
+            if url:
+                groups.append([str(url)] + (list(alias_urls) if isinstance(alias_urls, list) else []))
+        try:
+            with session.begin_nested():
+                restored = ArchiveService.restore(session, groups)
+                if restored:
+                    ZoneService.tier_listings_for_users(session, restored)
+                    logger.info(f"Restored {len(restored)} archived listings in {location}.")
+        except Exception as e:
+            logger.error(f"Restoring archived listings failed for {location}: {e}")
+
+        for _, prop in properties.iterrows():
+            try:
+                # Clean Data
+                data = PropertyProcessor.process_listing(prop)
+                if not data:
+                    continue
+                
+                # GIS Lookup
+                tier, contour = GISService.lookup_zone(session, data['lat'], data['lon'])
+                data['gis_tier'] = tier
+                data['gis_contour'] = contour
+                
+                # Store (Upsert)
+                is_new = PropertyStorage.upsert_property(session, data, listing_type)
+                
+                if is_new:
+                    count_loc_new += 1
+                    new_external_ids.append(str(data['prop_url']))
+                else:
+                    count_loc_updated += 1
+                    
+            except Exception as e:
+                import traceback
+                logger.error(f"Error processing property in {location}: {e} {traceback.format_exc()}")
+                continue
+        
+        # Tier new listings against every user's own zones
+        if new_external_ids:
+            try:
+                session.flush()
+                ZoneService.tier_listings_for_users(session, new_external_ids)
+            except Exception as e:
+                logger.error(f"Per-user tiering failed for {location}: {e}")
+
+        session.commit()
+        logger.info(f"Initial processing for {location}: {count_loc_new} new, {count_loc_updated} updated.")
+
+        if sweep:
+            grace_hours = AppConfig.get_scraper_settings().get("delist_grace_hours", 48)
+            try:
+                delisted = PropertyStorage.sweep_delisted(session, location, grace_hours, price_max)
+                session.commit()
+                if delisted:
+                    logger.info(f"Marked {delisted} listings in {location} as delisted.")
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Delisting sweep failed for {location}: {e}")
+
+    return count_loc_new, count_loc_updated
+
+def scrape_and_store_properties(
+    locations: Optional[list[str]] = None,
+    listing_type: list[str] = ["for_sale", "pending"],
+    past_days: Optional[int] = 1,
+    replay: bool = False,
+    price_max: Optional[int] = None,
+    tasks: Optional[List[ScrapeTask]] = None,
+):
     """
     Scrapes properties for a list of locations using HomeHarvest and Zillow, then stores them.
-    Orchestrates: Scraping -> Processing -> GIS Lookup -> Storage.
+    Orchestrates: Scraping -> Entity Resolution -> Processing -> GIS Lookup -> Storage.
+    With `replay=True` the raw scrapes are read from the scrape cache instead of the network.
+
+    `tasks` (from ScrapePlanner.plan) carry each location's own listing types and price
+    ceiling; otherwise every location uses `listing_type` and `price_max`.
+
+    Only a full-inventory fetch (`past_days=None`) in which every source completed shows
+    which listings disappeared, so only those locations are swept for delisted listings.
     """
-    logger.info(f"Starting scrape job for {len(locations)} locations. Past days: {past_days}")
+    if tasks is None:
+        price_max = price_max or ScrapePlanner.default_price_max()
+        tasks = [ScrapeTask(location, tuple(listing_type), price_max) for location in locations or []]
+    plan = {task.location: task for task in tasks}
+    locations = list(plan)
+
+    logger.info(f"Starting {'replay' if replay else 'scrape'} job for {len(locations)} locations. Past days: {past_days}")
     
     total_new = 0
     total_updated = 0
-    
-    target_property_types = ['single_family', 'multi_family', 'condos', 'townhomes', 'mobile', 'condo_townhome']
 
-    for location in locations:
-        logger.info(f"Scraping location: {location}")
+    if AppConfig.get_zillow_settings().get("enabled", False) and not replay:
+        # Warm the region cache in one batch; steady state this is a single DB read
         try:
-            dfs = []
-            
-            # 1. HomeHarvest Scrape
+            ZillowRegionResolver.resolve_many(locations)
+        except Exception as e:
+            logger.error(f"Zillow region prefetch failed: {e}")
+
+    with ReplicaCoordinator.location_locks(locations) as acquired:
+        for location in locations:
+            if location not in acquired:
+                logger.info(f"Skipping {location}: another replica holds its scrape lock.")
+
+        # 1. Fetch every location first so duplicates can be resolved across the whole run
+        frames = []
+        complete_locations = set()
+        for location in acquired:
             try:
-                hh_df = scrape_property(
-                    location=location,
-                    listing_type=listing_type,
-                    past_days=past_days,
-                    price_max=275000,
-                    property_type=target_property_types
-                )
-                if not hh_df.empty:
-                    dfs.append(hh_df)
+                task = plan[location]
+                frame, complete = _fetch_location(location, list(task.listing_types), past_days, task.price_max, replay)
+                frames.append(frame)
+                if complete:
+                    complete_locations.add(location)
+                else:
+                    logger.warning(f"Skipping delisting sweep for {location}: a source failed or was truncated.")
             except Exception as e:
-                logger.error(f"HomeHarvest scrape failed for {location}: {e}")
-
-            # 2. Zillow Direct Scrape
-            # try:
-            #     z_df = ZillowScraper.scrape(location)
-            #     if not z_df.empty:
-            #         dfs.append(z_df)
-            # except Exception as e:
-            #     logger.error(f"Zillow direct scrape failed for {location}: {e}")
-
-            if not dfs:
-                logger.info(f"No properties found for {location} from any source.")
-                continue
-                
-            properties = pd.concat(dfs, ignore_index=True)
-
-            # Log source distribution
-            if 'site_name' in properties.columns:
-                 logger.info(f"Sources for {location}: {properties['site_name'].unique()}")
-            elif 'property_url' in properties.columns:
-                 sites = properties['property_url'].apply(lambda x: 'zillow' if 'zillow.com' in str(x) else ('realtor' if 'realtor.com' in str(x) else 'other')).unique()
-                 logger.info(f"inferred Sources for {location}: {sites}")
-
-            # 3. Process & Store
-            with Session(engine) as session:
-                count_loc_new = 0
-                count_loc_updated = 0
-                
-                # Dedup properties to verify we don't process conflicting data in the same batch
-                if not properties.empty and 'property_url' in properties.columns:
-                     properties.drop_duplicates(subset=['property_url'], keep='first', inplace=True)
-                
-                for _, prop in properties.iterrows():
-                    try:
-                        # Clean Data
-                        data = PropertyProcessor.process_listing(prop)
-                        if not data:
-                            continue
-                        
-                        # GIS Lookup
-                        tier, contour = GISService.lookup_zone(session, data['lat'], data['lon'])
-                        data['gis_tier'] = tier
-                        data['gis_contour'] = contour
-                        
-                        # Store (Upsert)
-                        is_new = PropertyStorage.upsert_property(session, data, listing_type)
-                        
-                        if is_new:
-                            count_loc_new += 1
-                        else:
-                            count_loc_updated += 1
-                            
-                    except Exception as e:
-                        import traceback
-                        logger.error(f"Error processing property in {location}: {e} {traceback.format_exc()}")
-                        continue
-                
-                session.commit()
-                logger.info(f"Initial processing for {location}: {count_loc_new} new, {count_loc_updated} updated.")
+                logger.error(f"Failed to scrape {location}: {e}")
+
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            logger.info("Scraping job complete. No properties found.")
+            return
+
+        # 2. Merge the same house seen across sources and overlapping searches
+        properties = EntityResolver.resolve(pd.concat(frames, ignore_index=True))
+
+        # 3. Process & Store, one transaction per location
+        for location, location_props in properties.groupby('search_location', sort=False):
+            try:
+                # Replayed and past_days-limited results never delist anything
+                task = plan[location]
+                sweep = not replay and past_days is None and location in complete_locations
+                count_loc_new, count_loc_updated = _store_location(location, location_props, list(task.listing_types), sweep=sweep, price_max=task.price_max)
                 total_new += count_loc_new
                 total_updated += count_loc_updated
-
-        except Exception as e:
-            logger.error(f"Failed to scrape {location}: {e}")
-            continue
+            except Exception as e:
+                logger.error(f"Failed to store {location}: {e}")
+                continue
 
     logger.info(f"Scraping job complete. New: {total_new}, Updated: {total_updated}")
+
+    if total_new or total_updated:
+        AnalyticsService.refresh()
+        try:
+            ListingSnapshot.refresh()
+        except Exception as e:
+            logger.error(f"Listing snapshot rebuild failed: {e}")
@@ -0,0 +1,245 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import pandas as pd
+from shapely.geometry import shape
+from sqlmodel import Session, text
+
+from app.core.config import AppConfig
+from app.services.entity_resolution import EntityResolver
+from app.services.storage import DELISTED_STATUS
+
+logger = logging.getLogger(__name__)
+
+# Users with their own zones see their materialized tiers instead of the global ones
+TIER_SQL = "CASE WHEN :has_zones THEN ut.tier ELSE pl.gis_tier END"
+CONTOUR_SQL = "CASE WHEN :has_zones THEN ut.contour ELSE pl.gis_contour END"
+
+LISTING_SELECT_SQL = f"""
+    SELECT
+        pl.id, pl.address, pl.mls, pl.mls_id, pl.price, pl.beds, pl.baths, pl.sqft, pl.status, pl.property_url,
+        {TIER_SQL} AS gis_tier, {CONTOUR_SQL} AS gis_contour,
+        ST_Y(pl.location) AS lat, ST_X(pl.location) AS lon, pl.primary_image_url, pl.created_at"""
+
+LISTING_FROM_SQL = """
+    FROM property_listings pl
+    LEFT JOIN user_listing_tiers ut ON ut.property_id = pl.id AND ut.user_id = :user_id
+"""
+
+ORIGIN_SQL = "ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography"
+
+class ListingSearch:
+    """
+    Indexed lookups over the hot listings that don't need the full /properties payload.
+
+    - `search`: fuzzy street address match on the generated `address_normalized` column
+      (same normalization as entity resolution) or MLS number (`mls_id`) prefix match,
+      both via pg_trgm GIN indexes.
+    - `near`: K nearest listings, ordered by the GiST `<->` operator on the geography
+      expression index of `location`.
+    - `within`: listings within a radius (`ST_DWithin` on geography) or inside a polygon.
+    All of them take the usual attribute filters and only touch candidate rows.
+    """
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return EntityResolver.normalize_addresses(pd.Series([query])).iloc[0]
+
+    @staticmethod
+    def _like_prefix(value: str) -> str:
+        escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f"{escaped}%"
+
+    @staticmethod
+    def _filters(
+        include_delisted: bool = False,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_beds: Optional[float] = None,
+        min_baths: Optional[float] = None,
+        min_sqft: Optional[float] = None,
+        tiers: Optional[List[str]] = None,
+        statuses: Optional[List[str]] = None,
+    ) -> Tuple[List[str], Dict[str, Any]]:
+        """
+        WHERE clauses and their params for the /properties attribute filters.
+        """
+        clauses = ["(:include_delisted OR pl.status <> :delisted)"]
+        params: Dict[str, Any] = {"include_delisted": include_delisted, "delisted": DELISTED_STATUS}
+        for name, column, value in (
+            ("min_price", "pl.price >=", min_price),
+            ("max_price", "pl.price <=", max_price),
+            ("min_beds", "pl.beds >=", min_beds),
+            ("min_baths", "pl.baths >=", min_baths),
+            ("min_sqft", "pl.sqft >=", min_sqft),
+        ):
+            if value is not None:
+                clauses.append(f"{column} :{name}")
+                params[name] = value
+        if tiers:
+            clauses.append(f"lower({TIER_SQL}) = ANY(:tiers)")
+            params["tiers"] = [t.lower() for t in tiers]
+        if statuses:
+            clauses.append("lower(pl.status) = ANY(:statuses)")
+            params["statuses"] = [s.lower() for s in statuses]
+        return clauses, params
+
+    @staticmethod
+    def _results(rows) -> List[Dict[str, Any]]:
+        results = []
+        for row in rows:
+            result = dict(row._mapping)
+            result["id"] = str(result["id"])
+            for key in ("score", "distance_m"):
+                if result.get(key) is not None:
+                    result[key] = round(float(result[key]), 4 if key == "score" else 1)
+            results.append(result)
+        return results
+
+    @staticmethod
+    def parse_polygon(polygon: str) -> str:
+        """
+        Validates a GeoJSON Polygon/MultiPolygon (bare geometry or Feature) and returns the
+        geometry as a JSON string for ST_GeomFromGeoJSON.
+        """
+        try:
+            geometry = json.loads(polygon)
+        except ValueError:
+            raise ValueError("polygon must be GeoJSON")
+        if isinstance(geometry, dict) and geometry.get("type") == "Feature":
+            geometry = geometry.get("geometry")
+        if not isinstance(geometry, dict) or geometry.get("type") not in ("Polygon", "MultiPolygon"):
+            raise ValueError("polygon must be a GeoJSON Polygon or MultiPolygon")
+        try:
+            parsed = shape(geometry)
+        except Exception as e:
+            raise ValueError(f"polygon has malformed coordinates: {e}")
+        if parsed.is_empty or not parsed.is_valid:
+            raise ValueError("polygon must be a non-empty, valid (non-self-intersecting) polygon")
+        return json.dumps(geometry)
+
+    @classmethod
+    def search(
+        cls,
+        session: Session,
+        query: str,
+        limit: Optional[int] = None,
+        user_id: Optional[UUID] = None,
+        has_zones: bool = False,
+        include_delisted: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Best address / MLS matches first, each with its `score` (0-1).
+        """
+        settings = AppConfig.get_search_settings()
+        normalized = cls.normalize(query)
+        if not normalized:
+            return []
+
+        clauses, params = cls._filters(include_delisted=include_delisted)
+        statement = text(f"""
+            {LISTING_SELECT_SQL},
+                GREATEST(
+                    word_similarity(:q, pl.address_normalized),
+                    CASE WHEN pl.mls_id ILIKE :mls_pattern THEN 1.0 ELSE 0.0 END
+                ) AS score
+            {LISTING_FROM_SQL}
+            WHERE (:q <% pl.address_normalized OR pl.mls_id ILIKE :mls_pattern)
+              AND {" AND ".join(clauses)}
+            ORDER BY score DESC, pl.address
+            LIMIT :limit
+        """)
+        params.update({
+            "q": normalized,
+            "mls_pattern": cls._like_prefix(query.strip()),
+            "user_id": user_id,
+            "has_zones": has_zones,
+            "limit": limit or settings.get("default_limit", 20),
+        })
+
+        # Transaction-scoped, so pooled connections keep the server default
+        session.exec(
+            text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+            params={"threshold": str(settings.get("min_similarity", 0.4))}
+        )
+        return cls._results(session.exec(statement, params=params))
+
+    @classmethod
+    def near(
+        cls,
+        session: Session,
+        lat: float,
+        lon: float,
+        k: Optional[int] = None,
+        user_id: Optional[UUID] = None,
+        has_zones: bool = False,
+        **filters,
+    ) -> List[Dict[str, Any]]:
+        """
+        The `k` listings nearest to (lat, lon), nearest first, with `distance_m`.
+        """
+        clauses, params = cls._filters(**filters)
+        statement = text(f"""
+            {LISTING_SELECT_SQL},
+                pl.location::geography <-> {ORIGIN_SQL} AS distance_m
+            {LISTING_FROM_SQL}
+            WHERE pl.location IS NOT NULL AND {" AND ".join(clauses)}
+            ORDER BY pl.location::geography <-> {ORIGIN_SQL}
+            LIMIT :limit
+        """)
+        params.update({
+            "lat": lat,
+            "lon": lon,
+            "user_id": user_id,
+            "has_zones": has_zones,
+            "limit": k or AppConfig.get_search_settings().get("default_limit", 20),
+        })
+        return cls._results(session.exec(statement, params=params))
+
+    @classmethod
+    def within(
+        cls,
+        session: Session,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+        radius_km: Optional[float] = None,
+        polygon: Optional[str] = None,
+        limit: Optional[int] = None,
+        user_id: Optional[UUID] = None,
+        has_zones: bool = False,
+        **filters,
+    ) -> List[Dict[str, Any]]:
+        """
+        Listings within `radius_km` of (lat, lon), nearest first with `distance_m`, or
+        inside a GeoJSON `polygon`. At most `search.max_within_results` are returned.
+        """
+        max_results = AppConfig.get_search_settings().get("max_within_results", 5000)
+        clauses, params = cls._filters(**filters)
+        if polygon is not None:
+            area = "ST_Intersects(pl.location, ST_SetSRID(ST_GeomFromGeoJSON(:polygon), 4326))"
+            distance, order = "NULL::double precision", "pl.price"
+            params["polygon"] = cls.parse_polygon(polygon)
+        elif lat is not None and lon is not None and radius_km is not None:
+            area = f"ST_DWithin(pl.location::geography, {ORIGIN_SQL}, :radius_m)"
+            distance = f"ST_Distance(pl.location::geography, {ORIGIN_SQL})"
+            order = "distance_m"
+            params.update({"lat": lat, "lon": lon, "radius_m": radius_km * 1000})
+        else:
+            raise ValueError("Pass either lat, lon and radius_km, or polygon")
+
+        statement = text(f"""
+            {LISTING_SELECT_SQL},
+                {distance} AS distance_m
+            {LISTING_FROM_SQL}
+            WHERE {area} AND {" AND ".join(clauses)}
+            ORDER BY {order} NULLS LAST
+            LIMIT :limit
+        """)
+        params.update({
+            "user_id": user_id,
+            "has_zones": has_zones,
+            "limit": min(limit or max_results, max_results),
+        })
+        return cls._results(session.exec(statement, params=params))
@@ -1,8 +1,11 @@
-from sqlmodel import Session, select
+from datetime import datetime, timezone
+from sqlmodel import Session, select, text
 from app.core.models import PropertyListing, PropertyChangeLog
 from geoalchemy2.shape import from_shape
 from shapely.geometry import Point
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+DELISTED_STATUS = "delisted"
 
 class PropertyStorage:
     @staticmethod
@@ -14,8 +17,13 @@ class PropertyStorage:
         prop_url = data['prop_url']
         
         existing = session.exec(select(PropertyListing).where(PropertyListing.external_id == prop_url)).first()
+        if not existing and data.get('alias_urls'):
+            # The same house may already be stored under another source's URL
+            # (including a listing ArchiveService.restore just brought back)
+            existing = session.exec(select(PropertyListing).where(PropertyListing.external_id.in_(data['alias_urls']))).first()
         
         is_new = False
+        seen_at = datetime.now(timezone.utc)
         if existing:
             # Update
             # Update
@@ -42,6 +50,10 @@ class PropertyStorage:
             existing.beds = data['beds']
             existing.baths = data['baths']
             existing.sqft = data['sqft']
+            existing.county = data.get('county') or existing.county
+            existing.mls_id = data.get('mls_id') or existing.mls_id
+            existing.search_location = data.get('search_location') or existing.search_location
+            existing.last_seen_at = seen_at
             
             # Update images
             existing.primary_image_url = data.get('primary_image_url')
@@ -72,6 +84,10 @@ class PropertyStorage:
                 primary_image_url=data.get('primary_image_url'),
                 alt_images=data.get('alt_images'),
                 mls=data['mls'],
+                mls_id=data.get('mls_id'),
+                county=data.get('county'),
+                search_location=data.get('search_location'),
+                last_seen_at=seen_at,
                 price_tier=data['price_tier'],
                 gis_tier=data['gis_tier'],
                 gis_contour=data['gis_contour'],
@@ -81,3 +97,32 @@ class PropertyStorage:
             is_new = True
             
         return is_new
+
+    @staticmethod
+    def sweep_delisted(session: Session, search_location: str, grace_hours: float, price_max: Optional[int] = None) -> int:
+        """
+        Marks listings of `search_location` not seen within `grace_hours` as delisted and
+        logs the status change, all in one statement. Does not commit.
+        Locations match case-insensitively, like the scrape planner merges them, so rows
+        stored under another spelling of the location are swept too.
+        With `price_max`, listings priced above the scrape's ceiling are left alone, since
+        the scrape couldn't have seen them.
+        """
+        result = session.exec(text("""
+            WITH delisted AS (
+                UPDATE property_listings pl
+                SET status = :delisted
+                FROM property_listings prev
+                WHERE prev.id = pl.id
+                  AND lower(pl.search_location) = lower(:search_location)
+                  AND pl.status <> :delisted
+                  AND pl.last_seen_at < now() - :grace_hours * interval '1 hour'
+                  AND (CAST(:price_max AS double precision) IS NULL OR pl.price IS NULL OR pl.price <= :price_max)
+                RETURNING pl.id, prev.status AS old_status
+            )
+            INSERT INTO property_change_log (id, property_id, "timestamp", changes)
+            SELECT gen_random_uuid(), id, now() AT TIME ZONE 'utc',
+                   jsonb_build_object('status', jsonb_build_object('old', old_status, 'new', :delisted))
+            FROM delisted
+        """), params={"delisted": DELISTED_STATUS, "search_location": search_location, "grace_hours": grace_hours, "price_max": price_max})
+        return result.rowcount
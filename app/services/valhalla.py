@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.core.config import AppConfig
+from app.services.http_client import build_session, request_with_retries
+
+logger = logging.getLogger(__name__)
+
+class ValhallaClient:
+    """
+    Isochrone client for Valhalla (public, self-hosted or a local stub).
+
+    Responses are cached on disk keyed by (lat, lon, contours, costing, valhalla_url), so
+    repeated zone experiments don't re-fetch the same polygons. Contour lists longer than
+    the server's per-request limit are split and fetched concurrently over a pooled session.
+    """
+    _http_session = None
+    _http_lock = threading.Lock()
+
+    def __init__(
+        self,
+        valhalla_url: Optional[str] = None,
+        costing: str = "auto",
+        cache_directory: Optional[str] = None,
+        max_contours_per_request: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        settings = AppConfig.get_valhalla_settings()
+        self.valhalla_url = valhalla_url or settings.get("url", "https://valhalla1.openstreetmap.de/isochrone")
+        self.costing = costing
+        self.max_contours_per_request = max_contours_per_request or settings.get("max_contours_per_request", 4)
+        self.max_workers = max_workers or settings.get("max_workers", 4)
+        self.timeout = timeout or settings.get("timeout_seconds", 30)
+
+        directory = cache_directory or settings.get("cache_directory", ".cache/isochrones")
+        self.cache_directory = directory if os.path.isabs(directory) else os.path.join(AppConfig.get_base_dir(), directory)
+
+    @classmethod
+    def _http(cls, pool_size: int):
+        with cls._http_lock:
+            if cls._http_session is None:
+                cls._http_session = build_session(pool_size=pool_size)
+            return cls._http_session
+
+    def isochrones(self, lat: float, lon: float, contours: List[int]) -> Dict[str, Any]:
+        """
+        Returns a FeatureCollection with one feature per contour (minutes).
+        """
+        contours = sorted(set(int(c) for c in contours))
+        chunks = [contours[i:i + self.max_contours_per_request] for i in range(0, len(contours), self.max_contours_per_request)]
+
+        if len(chunks) == 1:
+            responses = [self._fetch_chunk(lat, lon, chunks[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+                responses = list(pool.map(lambda chunk: self._fetch_chunk(lat, lon, chunk), chunks))
+
+        features = [feature for data in responses for feature in data.get('features', [])]
+        return {"type": "FeatureCollection", "features": features}
+
+    def isochrones_many(self, origins: List[Tuple[float, float]], contours: List[int]) -> List[Dict[str, Any]]:
+        """
+        Fetches isochrones for several (lat, lon) origins concurrently, in origin order.
+        """
+        if len(origins) == 1:
+            return [self.isochrones(origins[0][0], origins[0][1], contours)]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(origins))) as pool:
+            return list(pool.map(lambda origin: self.isochrones(origin[0], origin[1], contours), origins))
+
+    def _cache_path(self, lat: float, lon: float, contours: List[int]) -> str:
+        key = json.dumps([round(lat, 6), round(lon, 6), contours, self.costing, self.valhalla_url])
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_directory, f"{digest}.json")
+
+    def _fetch_chunk(self, lat: float, lon: float, contours: List[int]) -> Dict[str, Any]:
+        path = self._cache_path(lat, lon, contours)
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    logger.info(f"Using cached isochrones for {lat}, {lon} contours {contours}")
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable isochrone cache entry {path}: {e}")
+
+        payload = {
+            "locations": [{"lat": lat, "lon": lon}],
+            "costing": self.costing,
+            # Valhalla expects contours in minutes
+            "contours": [{"time": c} for c in contours],
+            "polygons": True
+        }
+        response = request_with_retries(
+            self._http(self.max_workers), "POST", self.valhalla_url, max_retries=2, timeout=self.timeout, json=payload
+        )
+        data = response.json()
+
+        os.makedirs(self.cache_directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        return data
@@ -1,11 +1,21 @@
-import requests
 import logging
-from typing import Optional, Dict, Any, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Tuple
+from sqlmodel import Session, select
+
+from app.core.config import AppConfig
+from app.core.database import engine
+from app.core.models import ZillowRegion
+from app.services.http_client import build_session, request_with_retries
 
 logger = logging.getLogger(__name__)
 
 class ZillowRegionResolver:
     URL = "https://www.zillow.com/zg-graph"
+    TIMEOUT = 15
+    MAX_WORKERS = 4
     HEADERS = {
         "authority": "www.zillow.com",
         "method": "POST",
@@ -153,11 +163,127 @@ class ZillowRegionResolver:
     }
     """
 
+    _http_session = None
+    _http_lock = threading.Lock()
+
+    @classmethod
+    def _http(cls):
+        with cls._http_lock:
+            if cls._http_session is None:
+                cls._http_session = build_session(pool_size=cls.MAX_WORKERS, headers=cls.HEADERS)
+            return cls._http_session
+
     @classmethod
     def resolve(cls, location: str) -> Optional[Dict[str, Any]]:
         """
         Resolves a locaion string to Zillow region info.
         Returns a dict with regionId, regionType, etc. or None.
+        Served from the `zillow_regions` cache when a fresh entry exists.
+        """
+        return cls.resolve_many([location]).get(location)
+
+    @classmethod
+    def resolve_many(cls, locations: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Resolves several locations with one cache read; misses are looked up concurrently
+        and written back. Lookups that fail on network errors are returned as None and not cached.
+        """
+        locations = list(dict.fromkeys(locations))
+        resolved: Dict[str, Optional[Dict[str, Any]]] = {}
+
+        with Session(engine) as session:
+            cached = session.exec(select(ZillowRegion).where(ZillowRegion.location.in_(locations))).all()
+            for entry in cached:
+                if cls._is_fresh(entry):
+                    resolved[entry.location] = cls._to_region(entry)
+
+        misses = [loc for loc in locations if loc not in resolved]
+        if not misses:
+            return resolved
+
+        # Network lookups happen with no DB session (and connection) held
+        logger.info(f"Resolving {len(misses)} Zillow regions ({len(locations) - len(misses)} cached).")
+        with ThreadPoolExecutor(max_workers=cls.MAX_WORKERS) as pool:
+            results = list(pool.map(cls._lookup_safe, misses))
+
+        found = {}
+        for location, (ok, region) in zip(misses, results):
+            resolved[location] = region
+            if ok:
+                found[location] = region
+        if not found:
+            return resolved
+
+        with Session(engine) as session:
+            existing = {e.location: e for e in session.exec(select(ZillowRegion).where(ZillowRegion.location.in_(list(found)))).all()}
+            for location, region in found.items():
+                entry = existing.get(location) or ZillowRegion(location=location)
+                region_id = region["regionId"] if region else None
+                # Bounds stored by store_bounds stay valid as long as the region does
+                if entry.region_id != region_id:
+                    entry.north = entry.south = entry.east = entry.west = None
+                entry.region_id = region_id
+                entry.region_type = region["regionType"] if region else None
+                entry.display_name = region["displayName"] if region else None
+                entry.resolved_at = datetime.utcnow()
+                session.add(entry)
+                resolved[location] = cls._to_region(entry)
+            session.commit()
+
+        return resolved
+
+    @staticmethod
+    def _is_fresh(entry: ZillowRegion) -> bool:
+        settings = AppConfig.get_zillow_settings()
+        if entry.region_id is None:
+            ttl = timedelta(hours=settings.get("region_negative_ttl_hours", 24))
+        else:
+            ttl = timedelta(days=settings.get("region_cache_ttl_days", 90))
+        return datetime.utcnow() - entry.resolved_at < ttl
+
+    @staticmethod
+    def _to_region(entry: ZillowRegion) -> Optional[Dict[str, Any]]:
+        if entry.region_id is None:
+            return None
+        bounds = None
+        if None not in (entry.north, entry.south, entry.east, entry.west):
+            bounds = {"north": entry.north, "south": entry.south, "east": entry.east, "west": entry.west}
+        return {
+            "regionId": entry.region_id,
+            "regionType": entry.region_type,
+            "displayName": entry.display_name,
+            "bounds": bounds
+        }
+
+    @staticmethod
+    def store_bounds(location: str, bounds: Dict[str, float]):
+        """
+        Records the region bounding box Zillow reported for `location`.
+        """
+        with Session(engine) as session:
+            entry = session.get(ZillowRegion, location)
+            if not entry:
+                return
+            entry.north, entry.south = bounds["north"], bounds["south"]
+            entry.east, entry.west = bounds["east"], bounds["west"]
+            session.add(entry)
+            session.commit()
+
+    @classmethod
+    def _lookup_safe(cls, location: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Returns (ok, region). ok is False when the lookup errored, so it isn't negatively cached.
+        """
+        try:
+            return True, cls._lookup(location)
+        except Exception as e:
+            logger.error(f"Zillow region resolution failed for '{location}': {e}")
+            return False, None
+
+    @classmethod
+    def _lookup(cls, location: str) -> Optional[Dict[str, Any]]:
+        """
+        Queries zg-graph for `location`. Returns None if Zillow has no matching region.
         """
         payload = {
             "operationName": "GetQueryUnderstandingResults",
@@ -182,31 +308,23 @@ class ZillowRegionResolver:
             "querySource": "MANUAL"
         }
 
-        try:
-            response = requests.post(cls.URL, headers=cls.HEADERS, json=payload, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            results = data.get('data', {}).get('searchAssistanceResult', {}).get('results', [])
-            if results:
-                # Prioritize region results
-                for res in results:
-                    if res.get('__typename') == 'SearchAssistanceRegionResult':
-                        logger.info(f"Resolved '{location}' to Region: {res.get('id')} (ID: {res.get('regionId')})")
-                        return {
-                            "regionId": res.get("regionId"),
-                            "regionType": cls._map_subtype_to_type(res.get("subType")),
-                            "displayName": res.get("id")
-                        }
-            
-            logger.warning(f"Could not resolve location '{location}' to a specific Zillow region.")
-            return None
+        response = request_with_retries(cls._http(), "POST", cls.URL, max_retries=2, timeout=cls.TIMEOUT, json=payload, params=params)
+        data = response.json()
 
-        except Exception as e:
-            logger.error(f"Zillow region resolution failed: {e}")
-            if 'response' in locals():
-                logger.error(f"Response: {response.text}")
-            return None
+        results = data.get('data', {}).get('searchAssistanceResult', {}).get('results', [])
+        # Prioritize region results
+        for res in results:
+            if res.get('__typename') == 'SearchAssistanceRegionResult':
+                logger.info(f"Resolved '{location}' to Region: {res.get('id')} (ID: {res.get('regionId')})")
+                return {
+                    "regionId": res.get("regionId"),
+                    "regionType": cls._map_subtype_to_type(res.get("subType")),
+                    "displayName": res.get("id"),
+                    "bounds": None
+                }
+
+        logger.warning(f"Could not resolve location '{location}' to a specific Zillow region.")
+        return None
 
     @staticmethod
     def _map_subtype_to_type(subtype: str) -> int:
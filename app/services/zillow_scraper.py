@@ -1,8 +1,14 @@
-import requests
 import json
 import logging
+import math
+import threading
 import pandas as pd
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+from app.core.config import AppConfig
+from app.services.http_client import TokenBucket, build_session, request_with_retries
+from app.services.zillow_region_resolver import ZillowRegionResolver
 
 logger = logging.getLogger(__name__)
 
@@ -21,29 +27,227 @@ class ZillowScraper:
         "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36",
     }
 
+    # Whole-US bounds, used until the region's own bounding box is known
+    DEFAULT_BOUNDS = {"west": -124.848974, "east": -66.885444, "south": 24.396308, "north": 49.384358}
+
+    _default: Optional["ZillowScraper"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        requests_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        result_cap: Optional[int] = None,
+        max_tile_depth: Optional[int] = None,
+    ):
+        """
+        Explicit arguments override the `zillow` section of config.yaml, e.g. pointing
+        `base_url` at a local stub server.
+        """
+        settings = AppConfig.get_zillow_settings()
+        self.base_url = base_url or settings.get("base_url", self.BASE_URL)
+        self.max_workers = max_workers or settings.get("max_workers", 4)
+        self.timeout = timeout or settings.get("timeout_seconds", 20)
+        self.max_retries = max_retries if max_retries is not None else settings.get("max_retries", 3)
+        self.max_pages = max_pages or settings.get("max_pages", 20)
+        self.result_cap = result_cap or settings.get("result_cap", 500)
+        self.max_tile_depth = max_tile_depth if max_tile_depth is not None else settings.get("max_tile_depth", 6)
+        self.rate_limiter = TokenBucket(
+            requests_per_second or settings.get("requests_per_second", 1.0),
+            burst or settings.get("burst", 2)
+        )
+        self.session = build_session(pool_size=self.max_workers, headers=self.HEADERS)
+
+    @classmethod
+    def default(cls) -> "ZillowScraper":
+        """
+        Shared instance so the connection pool and rate limit span every location in a run.
+        """
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
     @staticmethod
     def scrape(location: str, price_max: int = 275000) -> pd.DataFrame:
         """
         Scrapes Zillow for properties in the given location.
-        Returns a DataFrame compatible with the existing scraper logic.
+        Returns a DataFrame compatible with the existing scraper logic. `df.attrs["complete"]`
+        is False when the scrape failed or was truncated.
+        """
+        try:
+            return ZillowScraper.default().fetch(location, price_max)
+        except Exception as e:
+            logger.error(f"Zillow direct scrape failed: {e}")
+            df = pd.DataFrame()
+            df.attrs["complete"] = False
+            return df
+
+    def fetch(self, location: str, price_max: int = 275000) -> pd.DataFrame:
+        """
+        Covers the location with a quadtree of map-bounds tiles.
+
+        Zillow truncates any single search at `result_cap` results, so the root tile is the
+        resolved region's bounding box and any tile whose total count reaches the cap is split
+        into four. Each level of tiles is fetched concurrently, and leaf tiles then fetch their
+        remaining pages concurrently. Results are deduplicated by zpid.
+
+        Without a resolved region there is nothing to pin the tiles to (they would cover the
+        whole US), so the location is searched by term only, as a single paginated search.
         """
         logger.info(f"Directly scraping Zillow API for {location}")
-        
-        # Note: regionId 2608 is for Albemarle County. 
-        # For a generic location, we'd need to first resolve the location to a regionId.
-        # However, Zillow API often accepts "usersSearchTerm" and tries to resolve it.
-        # But we must be careful. The HAR showed "regionSelection": [{"regionId": 2608}].
-        # If we omit regionSelection, Zillow might rely on usersSearchTerm.
-        
+
+        region = self._resolve_region(location)
+        if not (region and region.get("regionId")):
+            return self._fetch_by_term(location, price_max)
+
+        known_bounds = region.get("bounds")
+        root = known_bounds or self.DEFAULT_BOUNDS
+
+        listings: Dict[str, Dict[str, Any]] = {}
+        leaf_pages = []
+        requests_made = 0
+        truncated = False
+
+        level = [(root, 0)]
+        while level:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                responses = list(pool.map(lambda tile: self._fetch_page(location, price_max, 1, region, tile[0]), level))
+            requests_made += len(level)
+
+            next_level = []
+            for (bounds, depth), data in zip(level, responses):
+                split_bounds = bounds
+                if depth == 0 and region and not known_bounds:
+                    # The region-pinned root search reports the region's real bounding box
+                    region_bounds = self._region_bounds(data)
+                    if region_bounds:
+                        split_bounds = region_bounds
+                        self._store_bounds(location, region_bounds)
+
+                search_list = data.get('cat1', {}).get('searchList', {})
+                total = int(search_list.get('totalResultCount') or 0)
+                if total >= self.result_cap and depth < self.max_tile_depth:
+                    next_level.extend((child, depth + 1) for child in self._split(split_bounds))
+                    continue
+                if total >= self.result_cap:
+                    truncated = True
+                    logger.warning(f"Zillow tile {bounds} for {location} still has {total} results at max depth {self.max_tile_depth}; results are truncated.")
+
+                self._collect(listings, data)
+                reported_pages = int(search_list.get('totalPages') or 1)
+                truncated = truncated or reported_pages > self.max_pages
+                total_pages = min(reported_pages, self.max_pages)
+                leaf_pages.extend((bounds, page) for page in range(2, total_pages + 1))
+            level = next_level
+
+        if leaf_pages:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                for data in pool.map(lambda item: self._fetch_page(location, price_max, item[1], region, item[0]), leaf_pages):
+                    self._collect(listings, data)
+            requests_made += len(leaf_pages)
+
+        logger.info(f"Found {len(listings)} properties via direct API with {requests_made} requests.")
+        df = pd.DataFrame(list(listings.values()))
+        df.attrs["complete"] = not truncated
+        return df
+
+    def _fetch_by_term(self, location: str, price_max: int) -> pd.DataFrame:
+        """
+        Single `usersSearchTerm` search without map bounds: first page for the page count,
+        then the remaining pages concurrently.
+        """
+        first = self._fetch_page(location, price_max, 1)
+        search_list = first.get('cat1', {}).get('searchList', {})
+        reported_pages = int(search_list.get('totalPages') or 1)
+        total_pages = min(reported_pages, self.max_pages)
+        truncated = reported_pages > self.max_pages or int(search_list.get('totalResultCount') or 0) >= self.result_cap
+        if truncated:
+            logger.warning(f"Zillow search for {location} is truncated ({search_list.get('totalResultCount')} results, {reported_pages} pages).")
+
+        listings: Dict[str, Dict[str, Any]] = {}
+        self._collect(listings, first)
+        if total_pages > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                for data in pool.map(lambda page: self._fetch_page(location, price_max, page), range(2, total_pages + 1)):
+                    self._collect(listings, data)
+
+        logger.info(f"Found {len(listings)} properties via direct API search term across {total_pages} pages.")
+        df = pd.DataFrame(list(listings.values()))
+        df.attrs["complete"] = not truncated
+        return df
+
+    @classmethod
+    def _collect(cls, listings: Dict[str, Dict[str, Any]], data: Dict[str, Any]):
+        for listing in cls._parse_results(data.get('cat1', {}).get('searchResults', {}).get('listResults', [])):
+            listings.setdefault(listing['property_url'], listing)
+
+    @staticmethod
+    def _split(bounds: Dict[str, float]) -> List[Dict[str, float]]:
+        mid_lat = (bounds["north"] + bounds["south"]) / 2
+        mid_lon = (bounds["east"] + bounds["west"]) / 2
+        return [
+            {"north": bounds["north"], "south": mid_lat, "west": bounds["west"], "east": mid_lon},
+            {"north": bounds["north"], "south": mid_lat, "west": mid_lon, "east": bounds["east"]},
+            {"north": mid_lat, "south": bounds["south"], "west": bounds["west"], "east": mid_lon},
+            {"north": mid_lat, "south": bounds["south"], "west": mid_lon, "east": bounds["east"]},
+        ]
+
+    @staticmethod
+    def _region_bounds(data: Dict[str, Any]) -> Optional[Dict[str, float]]:
+        bounds = (data.get('regionState') or {}).get('regionBounds')
+        if bounds and all(bounds.get(k) is not None for k in ("north", "south", "east", "west")):
+            return {k: float(bounds[k]) for k in ("north", "south", "east", "west")}
+        return None
+
+    @staticmethod
+    def _store_bounds(location: str, bounds: Dict[str, float]):
+        try:
+            ZillowRegionResolver.store_bounds(location, bounds)
+        except Exception as e:
+            logger.warning(f"Could not cache region bounds for {location}: {e}")
+
+    @staticmethod
+    def _map_zoom(bounds: Dict[str, float]) -> int:
+        width = max(bounds["east"] - bounds["west"], 1e-6)
+        return max(1, min(20, int(round(math.log2(360 / width)))))
+
+    @staticmethod
+    def _resolve_region(location: str) -> Optional[Dict[str, Any]]:
+        try:
+            return ZillowRegionResolver.resolve(location)
+        except Exception as e:
+            logger.warning(f"Region lookup for {location} failed, searching by term only: {e}")
+            return None
+
+    def _fetch_page(self, location: str, price_max: int, page: int, region: Optional[Dict[str, Any]] = None, bounds: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        response = request_with_retries(
+            self.session,
+            "PUT",
+            self.base_url,
+            rate_limiter=self.rate_limiter,
+            max_retries=self.max_retries,
+            timeout=self.timeout,
+            data=json.dumps(self._build_payload(location, price_max, page, region, bounds)),
+        )
+        return response.json()
+
+    @classmethod
+    def _build_payload(cls, location: str, price_max: int, page: int = 1, region: Optional[Dict[str, Any]] = None, bounds: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        # The HAR showed "regionSelection": [{"regionId": 2608}] (Albemarle County).
+        # When the resolver knows the region we pin it; otherwise Zillow falls back to
+        # resolving "usersSearchTerm" itself. mapBounds restricts the search to one tile;
+        # without a tile the map is hidden so Zillow doesn't filter by the default bounds.
         payload = {
             "searchQueryState": {
-                "isMapVisible": False,
-                "mapBounds": {
-                    "west": -124.848974, # Default bounds (US?) or arbitrary if not using map search
-                    "east": -66.885444,
-                    "south": 24.396308,
-                    "north": 49.384358
-                },
+                "pagination": {"currentPage": page},
+                "isMapVisible": bounds is not None,
+                "mapBounds": dict(bounds or cls.DEFAULT_BOUNDS),
                 "filterState": {
                     "sortSelection": {"value": "globalrelevanceex"},
                     "isAcceptingBackupOffersSelected": {"value": True},
@@ -54,56 +258,49 @@ class ZillowScraper:
                     "isApartment": {"value": False}
                 },
                 "isListVisible": True,
-                "mapZoom": 6,
+                "mapZoom": cls._map_zoom(bounds or cls.DEFAULT_BOUNDS),
                 "usersSearchTerm": location,
-                # "regionSelection": [{"regionId": 2608}] # Omitted to let Zillow resolve term
             },
             "wants": {
                 "cat1": ["listResults"],
                 "cat2": ["total"],
                 "abTrials": ["total"]
             },
-            "requestId": 1,
+            "requestId": page,
             "isDebugRequest": False
         }
+        if region and region.get("regionId"):
+            payload["searchQueryState"]["regionSelection"] = [
+                {"regionId": region["regionId"], "regionType": region["regionType"]}
+            ]
+        return payload
 
-        try:
-            response = requests.put(ZillowScraper.BASE_URL, headers=ZillowScraper.HEADERS, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            
-            list_results = data.get('cat1', {}).get('searchResults', {}).get('listResults', [])
-            logger.info(f"Found {len(list_results)} properties via direct API.")
-            
-            listings = []
-            for item in list_results:
-                hdp = item.get('hdpData', {}).get('homeInfo', {})
-                address = item.get('address')
-                price = item.get('unformattedPrice')
-                zpid = item.get('zpid')
-                
-                listing = {
-                    'property_url': f"https://www.zillow.com/homedetails/{zpid}_zpid/" if zpid else None,
-                    'mls': None, # content not always available
-                    'formatted_address': address,
-                    'address': item.get('addressStreet'),
-                    'city': item.get('addressCity'),
-                    'state': item.get('addressState'),
-                    'zip': item.get('addressZipcode'),
-                    'list_price': price,
-                    'latitude': hdp.get('latitude'),
-                    'longitude': hdp.get('longitude'),
-                    'beds': hdp.get('bedrooms'),
-                    'full_baths': hdp.get('bathrooms'),
-                    'sqft': hdp.get('livingArea'),
-                    'year_built': None, # Not in search results usually
-                    'status': item.get('statusText'),
-                    'site_name': 'zillow'
-                }
-                listings.append(listing)
-                
-            return pd.DataFrame(listings)
+    @staticmethod
+    def _parse_results(list_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        listings = []
+        for item in list_results:
+            hdp = item.get('hdpData', {}).get('homeInfo', {})
+            zpid = item.get('zpid')
+            if not zpid:
+                continue
 
-        except Exception as e:
-            logger.error(f"Zillow direct scrape failed: {e}")
-            return pd.DataFrame()
+            listings.append({
+                'property_url': f"https://www.zillow.com/homedetails/{zpid}_zpid/",
+                'mls': None, # content not always available
+                'mls_id': None,
+                'formatted_address': item.get('address'),
+                'address': item.get('addressStreet'),
+                'city': item.get('addressCity'),
+                'state': item.get('addressState'),
+                'zip': item.get('addressZipcode'),
+                'list_price': item.get('unformattedPrice'),
+                'latitude': hdp.get('latitude'),
+                'longitude': hdp.get('longitude'),
+                'beds': hdp.get('bedrooms'),
+                'full_baths': hdp.get('bathrooms'),
+                'sqft': hdp.get('livingArea'),
+                'year_built': None, # Not in search results usually
+                'status': item.get('statusText'),
+                'site_name': 'zillow'
+            })
+        return listings
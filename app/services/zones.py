@@ -0,0 +1,183 @@
+import csv
+import io
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+import shapely
+from sqlmodel import Session, text
+
+from app.services.coordination import ReplicaCoordinator
+
+logger = logging.getLogger(__name__)
+
+class ZoneService:
+    """
+    Zones with `user_id IS NULL` are the global set, which drives `gis_tier`/`gis_contour`
+    on `property_listings`. A user's own zones are materialized into `user_listing_tiers`
+    so per-user map loads are a plain indexed read.
+
+    Point lookups never touch `hunter_zones` directly: every set is flattened into disjoint,
+    subdivided `hunter_zone_bands` (see `rebuild_zone_bands` in database.py).
+    """
+    COPY_BATCH_SIZE = 1000
+
+    @staticmethod
+    def user_has_zones(session: Session, user_id: UUID) -> bool:
+        statement = text("SELECT EXISTS (SELECT 1 FROM hunter_zones WHERE user_id = :user_id)")
+        return bool(session.exec(statement, params={"user_id": user_id}).scalar())
+
+    @staticmethod
+    def _scope(alias: str, user_id: Optional[UUID]) -> str:
+        return f"{alias}.user_id IS NULL" if user_id is None else f"{alias}.user_id = :user_id"
+
+    @staticmethod
+    def _copy_batch(session: Session, rows: List[list]):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        # Same connection (and transaction) as the session, so the temp table is visible
+        with session.connection().connection.cursor() as cur:
+            cur.copy_expert("COPY hunter_zones_incoming (tier, contour, geom) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    @classmethod
+    def replace_zones(cls, session: Session, zones: Iterable[Dict[str, Any]], user_id: Optional[UUID] = None) -> Dict[str, int]:
+        """
+        Atomically replaces one zone set (global, or `user_id`'s) with `zones`, given as
+        dicts of tier, contour and a Shapely `geom` (Polygon or MultiPolygon; repaired
+        with ST_MakeValid and stored as MultiPolygon). `zones` may be a generator; it is
+        consumed in batches and bulk-loaded with COPY, so memory stays bounded.
+
+        The new set is staged in a temp table and swapped in within a single transaction,
+        so readers never see an empty zone table. Only listings inside the symmetric
+        difference between the old and new geometry of some (tier, contour) are re-tiered.
+        If nothing usable was staged, the existing set is left untouched.
+        """
+        params = {"user_id": user_id}
+        scope = cls._scope("hz", user_id)
+
+        # Serialize replacements of the same set; readers are unaffected
+        session.exec(
+            text("SELECT pg_advisory_xact_lock(:ns, hashtext(:key))"),
+            params={"ns": ReplicaCoordinator.LOCK_NAMESPACE, "key": f"hunter_zones:{user_id or 'global'}"}
+        )
+
+        # 1. Stream the new set into a raw load table, then repair it into staging
+        session.exec(text("CREATE TEMP TABLE hunter_zones_incoming (tier text, contour int, geom geometry) ON COMMIT DROP"))
+        batch = []
+        for zone in zones:
+            batch.append([zone["tier"], zone["contour"], shapely.to_wkb(zone["geom"], hex=True)])
+            if len(batch) >= cls.COPY_BATCH_SIZE:
+                cls._copy_batch(session, batch)
+                batch = []
+        if batch:
+            cls._copy_batch(session, batch)
+
+        session.exec(text("CREATE TEMP TABLE hunter_zones_staging (LIKE hunter_zones INCLUDING DEFAULTS) ON COMMIT DROP"))
+        session.exec(text("""
+            INSERT INTO hunter_zones_staging (id, tier, contour, created_at, user_id, geom)
+            SELECT gen_random_uuid(), tier, contour, now() AT TIME ZONE 'utc', :user_id, geom
+            FROM (
+                SELECT tier, contour, ST_Multi(ST_CollectionExtract(ST_MakeValid(ST_SetSRID(geom, 4326)), 3)) AS geom
+                FROM hunter_zones_incoming
+            ) repaired
+            -- Inputs with no area left after repair (lines, collapsed rings) are dropped
+            WHERE NOT ST_IsEmpty(geom)
+        """), params=params)
+
+        stored = session.exec(text("SELECT count(*) FROM hunter_zones_staging")).scalar()
+        if not stored:
+            session.rollback()
+            logger.warning("No valid zones staged; keeping the existing zone set.")
+            return {"zones": 0, "affected_listings": 0, "retiered": 0}
+
+        # 2. Area whose tier may change: per (tier, contour), old XOR new geometry
+        session.exec(text(f"""
+            CREATE TEMP TABLE hunter_zone_changes ON COMMIT DROP AS
+            WITH old AS (
+                SELECT hz.tier, hz.contour, ST_Union(hz.geom) AS geom
+                FROM hunter_zones hz WHERE {scope} GROUP BY hz.tier, hz.contour
+            ), new AS (
+                SELECT tier, contour, ST_Union(geom) AS geom
+                FROM hunter_zones_staging GROUP BY tier, contour
+            ), diff AS (
+                SELECT ST_SymDifference(
+                    COALESCE(old.geom, ST_GeomFromText('POLYGON EMPTY', 4326)),
+                    COALESCE(new.geom, ST_GeomFromText('POLYGON EMPTY', 4326))
+                ) AS geom
+                FROM old FULL OUTER JOIN new USING (tier, contour)
+            )
+            SELECT ST_Subdivide(geom, 128) AS geom FROM diff WHERE NOT ST_IsEmpty(geom)
+        """), params=params)
+        session.exec(text("CREATE INDEX ON hunter_zone_changes USING GIST (geom)"))
+        session.exec(text("ANALYZE hunter_zone_changes"))
+        session.exec(text("""
+            CREATE TEMP TABLE affected_listings ON COMMIT DROP AS
+            SELECT pl.id, pl.location FROM property_listings pl
+            WHERE pl.location IS NOT NULL
+              AND EXISTS (SELECT 1 FROM hunter_zone_changes c WHERE ST_Intersects(c.geom, pl.location))
+        """))
+
+        # 3. Swap
+        session.exec(text(f"DELETE FROM hunter_zones hz WHERE {scope}"), params=params)
+        session.exec(text("INSERT INTO hunter_zones SELECT * FROM hunter_zones_staging"))
+        session.exec(text("SELECT rebuild_zone_bands(:user_id)"), params=params)
+
+        # 4. Re-tier only the affected listings
+        if user_id is None:
+            result = session.exec(text("""
+                UPDATE property_listings pl
+                SET gis_tier = m.tier, gis_contour = m.contour
+                FROM affected_listings a
+                LEFT JOIN LATERAL match_listing_zone(ST_X(a.location), ST_Y(a.location)) m ON true
+                WHERE pl.id = a.id
+                  AND (pl.gis_tier IS DISTINCT FROM m.tier OR pl.gis_contour IS DISTINCT FROM m.contour)
+            """))
+        else:
+            session.exec(text("""
+                DELETE FROM user_listing_tiers ult
+                USING affected_listings a
+                WHERE ult.user_id = :user_id AND ult.property_id = a.id
+            """), params=params)
+            result = session.exec(text("""
+                INSERT INTO user_listing_tiers (user_id, property_id, tier, contour)
+                SELECT DISTINCT ON (a.id) b.user_id, a.id, b.tier, b.contour
+                FROM affected_listings a
+                JOIN hunter_zone_bands b ON b.user_id = :user_id AND ST_Intersects(b.geom, a.location)
+                ORDER BY a.id, b.contour ASC
+            """), params=params)
+
+        affected = session.exec(text("SELECT count(*) FROM affected_listings")).scalar()
+        session.commit()
+
+        stats = {"zones": stored, "affected_listings": affected, "retiered": result.rowcount}
+        logger.info(f"Replaced {'global' if user_id is None else f'user {user_id}'} zones: {stats}")
+        return stats
+
+    @staticmethod
+    def tier_listings_for_users(session: Session, external_ids: List[str]) -> int:
+        """
+        Tiers the given listings against every user's zones in one statement.
+        Called for newly stored listings; does not commit.
+        """
+        if not external_ids:
+            return 0
+        result = session.exec(text("""
+            INSERT INTO user_listing_tiers (user_id, property_id, tier, contour)
+            SELECT DISTINCT ON (b.user_id, pl.id) b.user_id, pl.id, b.tier, b.contour
+            FROM property_listings pl
+            JOIN hunter_zone_bands b ON b.user_id IS NOT NULL AND ST_Intersects(b.geom, pl.location)
+            WHERE pl.external_id = ANY(:external_ids)
+            ORDER BY b.user_id, pl.id, b.contour ASC
+            ON CONFLICT (user_id, property_id) DO UPDATE
+                SET tier = EXCLUDED.tier, contour = EXCLUDED.contour
+        """), params={"external_ids": list(external_ids)})
+        return result.rowcount
+
+    @staticmethod
+    def user_tiers(session: Session, user_id: UUID) -> dict:
+        """
+        Returns {property_id: (tier, contour)} for one user.
+        """
+        statement = text("SELECT property_id, tier, contour FROM user_listing_tiers WHERE user_id = :user_id")
+        return {str(row.property_id): (row.tier, row.contour) for row in session.exec(statement, params={"user_id": user_id})}
@@ -6,6 +6,10 @@ import logging
 
 from app.core.database import init_db
 from app.services.scraper import scrape_and_store_properties
+from app.services.coordination import ReplicaCoordinator
+from app.services.change_log import ChangeLogService
+from app.services.archive import ArchiveService
+from app.services.scrape_planner import ScrapePlanner
 from app.api.api import api_router
 
 # Setup Logging
@@ -18,12 +22,15 @@ scheduler = AsyncIOScheduler()
 from app.core.config import AppConfig
 
 def run_scraper_job():
-    locations = AppConfig.get_locations()
-    scraper_settings = AppConfig.get_scraper_settings()
-    listing_types = scraper_settings.get("listing_types", ["for_sale"])
+    # One task per location across config.yaml and every user's settings;
+    # each replica only scrapes its share of them
+    plan = ScrapePlanner.plan()
+    owned = set(ReplicaCoordinator.claim_shard([task.location for task in plan]))
     
     logger.info("Triggering scheduled scraper job...")
-    scrape_and_store_properties(locations=locations, listing_type=listing_types)
+    # Full active inventory by default (scraper.past_days), so the run can also detect delisted listings
+    past_days = AppConfig.get_scraper_settings().get("past_days")
+    scrape_and_store_properties(tasks=[task for task in plan if task.location in owned], past_days=past_days)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -31,9 +38,18 @@ async def lifespan(app: FastAPI):
     logger.info("Initializing Database...")
     init_db()
     
+    logger.info(f"Registering replica {ReplicaCoordinator.replica_id}...")
+    ReplicaCoordinator.heartbeat()
+
     logger.info("Starting Scheduler...")
     interval = AppConfig.get_scheduler_interval()
+    heartbeat_seconds = AppConfig.get_coordination_settings().get("heartbeat_seconds", 30)
+    maintenance_hours = AppConfig.get_change_log_settings().get("maintenance_interval_hours", 24)
     scheduler.add_job(run_scraper_job, 'interval', hours=interval)
+    scheduler.add_job(ReplicaCoordinator.heartbeat, 'interval', seconds=heartbeat_seconds)
+    archive_hours = AppConfig.get_archive_settings().get("interval_hours", 24)
+    scheduler.add_job(ChangeLogService.maintain, 'interval', hours=maintenance_hours)
+    scheduler.add_job(ArchiveService.archive_inactive, 'interval', hours=archive_hours)
     scheduler.start()
     
     yield
@@ -41,6 +57,7 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down scheduler...")
     scheduler.shutdown()
+    ReplicaCoordinator.deregister()
 
 app = FastAPI(title="The Hunter Toolbelt", lifespan=lifespan)
 
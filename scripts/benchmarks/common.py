@@ -0,0 +1,123 @@
+"""
+Shared helpers for the benchmark scripts: stage timing, memory high-water marks,
+JSON result files and run-to-run comparison.
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy.engine import make_url
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def check_bench_database(database_url: str, force: bool = False):
+    """
+    Benchmarks replace zones and bulk-write listings, so refuse to run against anything
+    that doesn't look like a scratch database unless --force is given.
+    """
+    url = make_url(database_url)
+    is_local = url.host in (None, "localhost", "127.0.0.1", "db")
+    is_scratch = (url.database or "").endswith("_bench")
+    if force or (is_local and is_scratch):
+        return
+    raise SystemExit(
+        f"Refusing to benchmark against '{url.database}' on '{url.host}'. "
+        "Point DATABASE_URL at a local database whose name ends in '_bench', or pass --force."
+    )
+
+class BenchmarkRun:
+    """
+    Collects per-stage measurements and writes them as a JSON document.
+    """
+    def __init__(self, name: str, params: Dict[str, Any], trace_memory: bool = False):
+        self.name = name
+        self.params = params
+        self.trace_memory = trace_memory
+        self.stages: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, stage_name: str, rows: int = 0, **extra):
+        """
+        Times a block and records rows/second and the process peak RSS. With `trace_memory`
+        the peak Python allocation inside the block is recorded too (tracemalloc slows the
+        block down, so timings from traced runs shouldn't be compared with untraced ones).
+        Extra keys can be added to the yielded dict.
+        """
+        record: Dict[str, Any] = {"stage": stage_name, "rows": rows, **extra}
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            elapsed = time.perf_counter() - start
+            traced_peak = None
+            if self.trace_memory:
+                _, traced_peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            rows = record.get("rows", rows)
+            record["seconds"] = round(elapsed, 4)
+            record["rows_per_second"] = round(rows / elapsed, 1) if elapsed > 0 and rows else None
+            record["peak_rss_mb"] = round(peak_rss_mb(), 1)
+            record["peak_traced_mb"] = round(traced_peak / (1024 * 1024), 1) if traced_peak is not None else None
+            self.stages.append(record)
+            print(f"  {stage_name:<32} {rows:>9} rows  {elapsed:>9.3f}s  "
+                  f"{record['rows_per_second'] or 0:>11.1f} rows/s  rss {record['peak_rss_mb']} MB")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "benchmark": self.name,
+            "timestamp": datetime.utcnow().isoformat(),
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "params": self.params,
+            "trace_memory": self.trace_memory,
+            "stages": self.stages,
+        }
+
+    def save(self, output: Optional[str] = None) -> str:
+        if not output:
+            stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+            output = os.path.join("bench_results", f"{self.name}-{stamp}.json")
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        print(f"Results written to {output}")
+        return output
+
+def compare_results(baseline_path: str, current: Dict[str, Any], metric: str = "rows_per_second", key_fields=("stage",)):
+    """
+    Prints the relative change of `metric` for every stage present in both runs.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def key(stage):
+        return tuple(stage.get(k) for k in key_fields)
+
+    before = {key(s): s for s in baseline.get("stages", [])}
+    print(f"\nComparison against {baseline_path} ({baseline.get('git_revision')}) on {metric}:")
+    for stage in current.get("stages", []):
+        old = before.get(key(stage))
+        if not old or not old.get(metric) or stage.get(metric) is None:
+            continue
+        delta = (stage[metric] - old[metric]) / old[metric] * 100
+        label = " / ".join(str(k) for k in key(stage))
+        print(f"  {label:<48} {old[metric]:>12} -> {stage[metric]:>12}  ({delta:+.1f}%)")
@@ -0,0 +1,127 @@
+"""
+Synthetic data generators for the benchmark scripts.
+
+Frames mimic the columns HomeHarvest returns, and zones mimic Valhalla's nested isochrone
+FeatureCollections, so the real ingest code can run without any live scraping.
+"""
+import math
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+BENCH_URL_PREFIX = "https://bench.househunter.invalid/homedetails/"
+
+# Roughly Charlottesville, VA
+DEFAULT_CENTER = (38.03, -78.48)
+
+STATUSES = np.array(["FOR_SALE", "PENDING", "CONTINGENT"])
+STREET_NAMES = np.array(["Main", "Oak", "Maple", "Cedar", "Pine", "Elm", "Washington", "Lake", "Hill", "Ridge"])
+STREET_SUFFIXES = np.array(["St", "Ave", "Rd", "Ln", "Dr", "Ct"])
+CITIES = np.array(["Charlottesville", "Crozet", "Scottsville", "Earlysville", "Keswick"])
+
+def make_listings_frame(
+    n: int,
+    seed: int = 0,
+    center: Tuple[float, float] = DEFAULT_CENTER,
+    spread_deg: float = 0.6,
+    duplicate_ratio: float = 0.0,
+    id_offset: int = 0,
+) -> pd.DataFrame:
+    """
+    Builds a HomeHarvest-shaped DataFrame with `n` unique listings.
+    `duplicate_ratio` appends that fraction of rows again (same property_url) to exercise dedup.
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(id_offset, id_offset + n)
+
+    house_numbers = rng.integers(1, 9999, n)
+    streets = STREET_NAMES[rng.integers(0, len(STREET_NAMES), n)]
+    suffixes = STREET_SUFFIXES[rng.integers(0, len(STREET_SUFFIXES), n)]
+    cities = CITIES[rng.integers(0, len(CITIES), n)]
+    street = [f"{num} {name} {suf}" for num, name, suf in zip(house_numbers, streets, suffixes)]
+
+    df = pd.DataFrame({
+        "property_url": [f"{BENCH_URL_PREFIX}{i}" for i in ids],
+        "property_id": ids.astype(str),
+        "mls": "BENCH",
+        "mls_id": [f"B{i:08d}" for i in ids],
+        "status": STATUSES[rng.choice(len(STATUSES), n, p=[0.8, 0.15, 0.05])],
+        "style": "SINGLE_FAMILY",
+        "street": street,
+        "city": cities,
+        "state": "VA",
+        "zip_code": rng.integers(22901, 22999, n).astype(str),
+        "formatted_address": [f"{s}, {c}, VA" for s, c in zip(street, cities)],
+        "county": "Albemarle",
+        "beds": rng.integers(1, 6, n),
+        "full_baths": rng.integers(1, 4, n),
+        "half_baths": rng.integers(0, 2, n),
+        "sqft": rng.integers(600, 4000, n),
+        "year_built": rng.integers(1900, 2024, n),
+        "list_price": (rng.integers(120, 350, n) * 1000).astype(float),
+        "list_date": pd.Timestamp.today().normalize() - pd.to_timedelta(rng.integers(0, 90, n), unit="D"),
+        "latitude": center[0] + rng.uniform(-spread_deg, spread_deg, n),
+        "longitude": center[1] + rng.uniform(-spread_deg, spread_deg, n),
+        "primary_photo": [f"https://photos.invalid/{i}/0.jpg" for i in ids],
+        "alt_photos": [[f"https://photos.invalid/{i}/{k}.jpg" for k in range(1, 4)] for i in ids],
+        "site_name": "realtor.com",
+    })
+
+    if duplicate_ratio > 0:
+        dupes = df.sample(frac=min(duplicate_ratio, 1.0), random_state=seed)
+        df = pd.concat([df, dupes], ignore_index=True)
+
+    return df
+
+def make_changed_frame(previous: pd.DataFrame, change_ratio: float, seed: int = 1) -> pd.DataFrame:
+    """
+    Returns a copy of `previous` where `change_ratio` of the listings have a new price or status,
+    the shape of a follow-up scrape of the same location.
+    """
+    rng = np.random.default_rng(seed)
+    df = previous.drop_duplicates(subset=["property_url"]).copy().reset_index(drop=True)
+    changed = rng.random(len(df)) < change_ratio
+    price_cut = changed & (rng.random(len(df)) < 0.7)
+    status_flip = changed & ~price_cut
+
+    df.loc[price_cut, "list_price"] = (df.loc[price_cut, "list_price"] * 0.97).round(-3)
+    df.loc[status_flip, "status"] = "PENDING"
+    return df
+
+def make_nested_zones(
+    center: Tuple[float, float] = DEFAULT_CENTER,
+    contours: Tuple[int, ...] = (40, 60, 75),
+    vertices: int = 128,
+    seed: int = 0,
+    degrees_per_minute: float = 0.008,
+) -> Dict[str, Any]:
+    """
+    Builds a FeatureCollection of nested, irregular isochrone-like polygons.
+    The same angular noise is scaled per contour, so each ring strictly contains the smaller ones.
+    """
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(0, 2 * math.pi, vertices, endpoint=False)
+    noise = 1 + 0.35 * np.sin(angles * rng.integers(2, 6)) * rng.uniform(0.5, 1.0, vertices)
+
+    features: List[Dict[str, Any]] = []
+    for contour in sorted(contours, reverse=True):
+        radius = contour * degrees_per_minute * noise
+        lons = center[1] + radius * np.cos(angles) / math.cos(math.radians(center[0]))
+        lats = center[0] + radius * np.sin(angles)
+        ring = [[float(x), float(y)] for x, y in zip(lons, lats)]
+        ring.append(ring[0])
+        features.append({
+            "type": "Feature",
+            "properties": {"contour": contour, "metric": "time"},
+            "geometry": {"type": "Polygon", "coordinates": [ring]},
+        })
+
+    return {"type": "FeatureCollection", "features": features}
+
+def split_by_location(df: pd.DataFrame, n_locations: int, label: Optional[str] = "Bench Location") -> Dict[str, pd.DataFrame]:
+    """
+    Splits a frame into `n_locations` chunks keyed by a synthetic location name.
+    """
+    chunks = np.array_split(df, n_locations)
+    return {f"{label} {i + 1}": chunk.reset_index(drop=True) for i, chunk in enumerate(chunks)}
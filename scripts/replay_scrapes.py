@@ -0,0 +1,42 @@
+import sys
+import os
+import argparse
+
+# Add parent directory to path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import AppConfig
+from app.core.database import init_db
+from app.services.scraper import scrape_and_store_properties
+from app.services.scrape_planner import ScrapePlanner, ScrapeTask
+
+def replay_scrapes():
+    """
+    Re-runs processing, GIS tagging and storage from the scrape cache without any network calls.
+    Useful after a code or zone change.
+    """
+    scraper_settings = AppConfig.get_scraper_settings()
+
+    parser = argparse.ArgumentParser(description="Replay cached scrapes through the ingest pipeline.")
+    parser.add_argument("--location", action="append", help="Location to replay (repeatable). Defaults to config.yaml locations.")
+    # Defaults to the scheduled job's window, so its cache entries are the ones found
+    parser.add_argument("--past-days", type=int, default=scraper_settings.get("past_days"), help="Omit for full-inventory scrapes (scraper.past_days).")
+    args = parser.parse_args()
+
+    print("Initializing Database...")
+    init_db()
+
+    # Same plan as a live run, so each location's cache key (types, price ceiling) matches
+    plan = ScrapePlanner.plan()
+    if args.location:
+        planned = {task.location.lower(): task for task in plan}
+        plan = [
+            planned.get(location.lower()) or ScrapeTask(location, tuple(ScrapePlanner.default_listing_types()), ScrapePlanner.default_price_max())
+            for location in args.location
+        ]
+
+    print(f"Replaying {len(plan)} locations from cache...")
+    scrape_and_store_properties(tasks=plan, past_days=args.past_days, replay=True)
+
+if __name__ == "__main__":
+    replay_scrapes()
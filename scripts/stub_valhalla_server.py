@@ -0,0 +1,71 @@
+"""
+Local stand-in for Valhalla's /isochrone endpoint.
+
+Answers isochrone requests with deterministic nested polygons around the requested
+origin, so zone generation can be run and tested offline.
+
+    python scripts/stub_valhalla_server.py --port 8002
+    # then: POST /admin/generate-zones with "valhalla_url": "http://127.0.0.1:8002/isochrone"
+"""
+import sys
+import os
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to path so we can import the synthetic zone generator
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.benchmarks.synthetic import make_nested_zones
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    vertices = 128
+    request_count = 0
+
+    def do_POST(self):
+        type(self).request_count += 1
+        length = int(self.headers.get("content-length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        origin = body.get("locations", [{}])[0]
+        contours = [int(c["time"]) for c in body.get("contours", [])]
+        if "lat" not in origin or "lon" not in origin or not contours:
+            self.send_response(400)
+            self.end_headers()
+            return
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        # Seed on the origin so the same request always gets the same shapes
+        seed = int(abs(origin["lat"] * 1e4) + abs(origin["lon"] * 1e4))
+        data = make_nested_zones(center=(origin["lat"], origin["lon"]), contours=tuple(contours), vertices=self.vertices, seed=seed)
+        payload = json.dumps(data).encode()
+
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(host: str = "127.0.0.1", port: int = 8002, **options) -> ThreadingHTTPServer:
+    for key, value in options.items():
+        setattr(StubHandler, key, value)
+    return ThreadingHTTPServer((host, port), StubHandler)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local Valhalla isochrone stub.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--vertices", type=int, default=128, help="Vertices per isochrone ring.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to sleep per request.")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, vertices=args.vertices, latency=args.latency)
+    print(f"Valhalla stub listening on http://{args.host}:{args.port}/isochrone")
+    server.serve_forever()
@@ -0,0 +1,128 @@
+"""
+Local stand-in for Zillow's async-create-search-page-state endpoint.
+
+Serves deterministic paginated search results so ZillowScraper can be exercised without
+touching Zillow. Like Zillow, searches are filtered by mapBounds and truncated at a result
+cap, so the quadtree tiler can be tested too. Optional latency and failure injection cover
+the retry path.
+
+    python scripts/stub_zillow_server.py --listings 3000 --result-cap 500 --fail-rate 0.1
+    # then: ZillowScraper(base_url="http://127.0.0.1:8765/async-create-search-page-state")
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def make_listing(zpid: int):
+    rng = random.Random(zpid)
+    return {
+        "zpid": str(zpid),
+        "address": f"{rng.randint(1, 9999)} Stub St, Charlottesville, VA 22901",
+        "addressStreet": f"{rng.randint(1, 9999)} Stub St",
+        "addressCity": "Charlottesville",
+        "addressState": "VA",
+        "addressZipcode": "22901",
+        "unformattedPrice": rng.randint(120, 350) * 1000,
+        "statusText": "House for sale",
+        "hdpData": {"homeInfo": {
+            "latitude": 38.03 + rng.uniform(-0.3, 0.3),
+            "longitude": -78.48 + rng.uniform(-0.3, 0.3),
+            "bedrooms": rng.randint(1, 5),
+            "bathrooms": rng.randint(1, 3),
+            "livingArea": rng.randint(600, 4000),
+        }},
+    }
+
+def listing_index(count: int):
+    return [make_listing(zpid) for zpid in range(count)]
+
+def in_bounds(listing, bounds) -> bool:
+    home = listing["hdpData"]["homeInfo"]
+    return (bounds["south"] <= home["latitude"] < bounds["north"]
+            and bounds["west"] <= home["longitude"] < bounds["east"])
+
+class StubHandler(BaseHTTPRequestHandler):
+    listings = 500
+    page_size = 41
+    result_cap = 500
+    latency = 0.0
+    fail_rate = 0.0
+    request_count = 0
+    lock = threading.Lock()
+
+    def do_PUT(self):
+        with self.lock:
+            type(self).request_count += 1
+
+        length = int(self.headers.get("content-length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        query = body.get("searchQueryState", {})
+        page = query.get("pagination", {}).get("currentPage", 1)
+
+        if self.latency:
+            time.sleep(self.latency)
+        if random.random() < self.fail_rate:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+
+        homes = self.index()
+        region_bounds = {
+            "north": max(h["hdpData"]["homeInfo"]["latitude"] for h in homes) + 1e-6,
+            "south": min(h["hdpData"]["homeInfo"]["latitude"] for h in homes),
+            "east": max(h["hdpData"]["homeInfo"]["longitude"] for h in homes) + 1e-6,
+            "west": min(h["hdpData"]["homeInfo"]["longitude"] for h in homes),
+        }
+        if query.get("mapBounds"):
+            homes = [h for h in homes if in_bounds(h, query["mapBounds"])]
+
+        # Like Zillow: the true count is reported, but only result_cap results are reachable
+        reachable = homes[:self.result_cap]
+        total_pages = max(1, -(-len(reachable) // self.page_size))
+        start = (page - 1) * self.page_size
+        payload = json.dumps({
+            "cat1": {
+                "searchResults": {"listResults": reachable[start:start + self.page_size]},
+                "searchList": {"totalPages": total_pages, "totalResultCount": len(homes)},
+            },
+            "regionState": {"regionBounds": region_bounds},
+        }).encode()
+
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    @classmethod
+    def index(cls):
+        if getattr(cls, "_index", None) is None or len(cls._index) != cls.listings:
+            cls._index = listing_index(cls.listings)
+        return cls._index
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(host: str = "127.0.0.1", port: int = 8765, **options) -> ThreadingHTTPServer:
+    for key, value in options.items():
+        setattr(StubHandler, key, value)
+    return ThreadingHTTPServer((host, port), StubHandler)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local Zillow search stub.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--listings", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=41)
+    parser.add_argument("--result-cap", type=int, default=500, help="Max results reachable per search.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to sleep per request.")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 503.")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, listings=args.listings, page_size=args.page_size, result_cap=args.result_cap, latency=args.latency, fail_rate=args.fail_rate)
+    print(f"Zillow stub listening on http://{args.host}:{args.port}/async-create-search-page-state")
+    server.serve_forever()